@@ -7,80 +7,156 @@ Automatically detects user intentions and creates follow-up reminders.
 import re
 import json
 import os
-from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict, field
-from typing import List, Optional, Dict
-from collections import defaultdict
+import heapq
+import functools
+import itertools
+import time
+from datetime import datetime, timezone
+from dataclasses import dataclass, asdict
+from typing import List, Optional, Dict, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used as a fallback
+    orjson = None
 
 
 # ============================================================================
 # Intent Patterns
 # ============================================================================
 
+# Captured content: a run of characters ending at whitespace or sentence
+# punctuation. The class is left unbounded, which keeps the fused program
+# small; detect() trims the capture to CONTENT_MAX_LEN characters instead.
+CONTENT = r"([^\s，。！？]+)"
+CONTENT_MAX_LEN = 80
+
 INTENT_PATTERNS = {
     # Project/Goal intentions
     "project": [
-        r"我要做个?([^\s，。]+)",
-        r"我想开发([^\s，。]+)",
-        r"打算做一个?([^\s，。]+)",
-        r"准备搭建([^\s，。]+)",
-        r"想做个([^\s，。]+)",
-        r"打算开发([^\s，。]+)",
-        r"开始做([^\s，。]+)",
-        r"启动([^\s，。]+)项目",
-        r"来做([^\s，。]+)",
-        r"弄个([^\s，。]+)",
+        rf"我要做个?{CONTENT}",
+        rf"我想开发{CONTENT}",
+        rf"打算做一个?{CONTENT}",
+        rf"准备搭建{CONTENT}",
+        rf"想做个{CONTENT}",
+        rf"打算开发{CONTENT}",
+        rf"开始做{CONTENT}",
+        rf"启动{CONTENT}项目",
+        rf"来做{CONTENT}",
+        rf"弄个{CONTENT}",
     ],
     
     # Todo/Task intentions
     "todo": [
-        r"待会儿要([^\s，。]+)",
-        r"一会儿要([^\s，。]+)",
-        r"记得去([^\s，。]+)",
-        r"等下要([^\s，。]+)",
-        r"晚点要([^\s，。]+)",
-        r"下一步做([^\s，。]+)",
-        r"接下来([^\s，。]+)",
-        r"下一步是([^\s，。]+)",
-        r"下一步要([^\s，。]+)",
+        rf"待会儿要{CONTENT}",
+        rf"一会儿要{CONTENT}",
+        rf"记得去{CONTENT}",
+        rf"等下要{CONTENT}",
+        rf"晚点要{CONTENT}",
+        rf"下一步做{CONTENT}",
+        rf"接下来{CONTENT}",
+        rf"下一步是{CONTENT}",
+        rf"下一步要{CONTENT}",
     ],
     
     # Decision intentions
     "decision": [
-        r"决定了([^\s，。]+)",
-        r"就用([^\s，。]+)",
-        r"选([^\s，。]+)吧",
-        r"还是用([^\s，。]+)",
-        r"敲定了([^\s，。]+)",
-        r"确定了([^\s，。]+)",
-        r"就([^\s，。]+)吧",
+        rf"决定了{CONTENT}",
+        rf"就用{CONTENT}",
+        rf"选{CONTENT}吧",
+        rf"还是用{CONTENT}",
+        rf"敲定了{CONTENT}",
+        rf"确定了{CONTENT}",
+        rf"就{CONTENT}吧",
     ],
     
     # Research/Learn intentions
     "research": [
-        r"想了解一下([^\s，。]+)",
-        r"研究一下([^\s，。]+)",
-        r"看看([^\s，。]+)",
-        r"查查([^\s，。]+)",
-        r"了解一下([^\s，。]+)",
+        rf"想了解一下{CONTENT}",
+        rf"研究一下{CONTENT}",
+        rf"看看{CONTENT}",
+        rf"查查{CONTENT}",
+        rf"了解一下{CONTENT}",
     ],
     
     # Meeting/Schedule intentions
     "schedule": [
-        r"明天要([^\s，。]+)",
-        r"今天下午([^\s，。]+)",
-        r"这周要([^\s，。]+)",
-        r"找个时间([^\s，。]+)",
-        r"安排一下([^\s，。]+)",
+        rf"明天要{CONTENT}",
+        rf"今天下午{CONTENT}",
+        rf"这周要{CONTENT}",
+        rf"找个时间{CONTENT}",
+        rf"安排一下{CONTENT}",
     ]
 }
 
 
+def _fuse_patterns(patterns: List[str]):
+    """
+    Fuse patterns into one alternation so the text is scanned once.
+    
+    Branch i is wrapped in a named group ``p{i}``; its own capture group
+    follows directly after it.
+    """
+    return re.compile(
+        "|".join(f"(?P<p{i}>{p})" for i, p in enumerate(patterns)),
+        re.IGNORECASE
+    )
+
+
+def _leading_literal(pattern: str) -> str:
+    """Return the fixed text every match of ``pattern`` must start with."""
+    for i, ch in enumerate(pattern):
+        if ch in "?*{":
+            # Quantifier makes the previous character optional
+            return pattern[:i - 1]
+        if ch in "()[]+|.^$\\":
+            return pattern[:i]
+    return pattern
+
+
+# Compiled once at import, one alternation per intent type.
+# INTENT_PATTERNS keeps the raw strings for debugging.
+INTENT_PATTERNS_FUSED = {
+    intent_type: _fuse_patterns(patterns)
+    for intent_type, patterns in INTENT_PATTERNS.items()
+}
+
+# Literal prefixes per intent type. If none of them occurs in the text the
+# category's regex cannot match, so detect() skips it.
+INTENT_TRIGGERS = {
+    intent_type: tuple(dict.fromkeys(_leading_literal(p).lower() for p in patterns))
+    for intent_type, patterns in INTENT_PATTERNS.items()
+}
+
+# Any trigger at all; a message without one cannot contain an intent
+ANY_TRIGGER_RE = re.compile("|".join(
+    re.escape(t) for t in dict.fromkeys(
+        t for triggers in INTENT_TRIGGERS.values() for t in triggers
+    )
+))
+
+
+# ============================================================================
+# Entity Patterns
+# ============================================================================
+
+DATE_PATTERNS = [
+    re.compile(r"(明天|今天|后天|大后天)"),
+    re.compile(r"(\d+月\d+日)"),
+    re.compile(r"(\d+/\d+)"),
+]
+
+# Common tool names, matched as substrings in a single pass
+TOOLS = ["python", "javascript", "react", "vue", "fastapi", "flask",
+         "docker", "kubernetes", "postgresql", "mongodb", "redis"]
+TOOLS_RE = re.compile("|".join(map(re.escape, TOOLS)), re.IGNORECASE)
+
+
 # ============================================================================
 # Data Classes
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class DetectedIntent:
     """Detected intent from conversation."""
     intent_type: str  # project, todo, decision, research, schedule
@@ -91,7 +167,7 @@ class DetectedIntent:
     source: str       # "user" or "assistant"
 
 
-@dataclass
+@dataclass(slots=True)
 class TodoItem:
     """Todo item for follow-up."""
     id: str
@@ -109,7 +185,7 @@ class TodoItem:
     related_intent_id: Optional[str]  # Link to original intent
 
 
-@dataclass
+@dataclass(slots=True)
 class ProgressNote:
     """Progress note for a project."""
     id: str
@@ -126,8 +202,11 @@ class ProgressNote:
 class IntentDetector:
     """Detects user intentions from text."""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 1024):
         self.confidence_threshold = 0.5
+        # Matching depends only on the text, so repeated messages
+        # (greetings, replays) are served from a per-detector LRU cache.
+        self._match = functools.lru_cache(maxsize=cache_size)(self._match_text)
     
     def detect(self, text: str, source: str = "user") -> List[DetectedIntent]:
         """
@@ -140,44 +219,61 @@ class IntentDetector:
         Returns:
             List of detected intents
         """
-        intents = []
         text = text.strip()
+        now_iso = datetime.utcnow().isoformat()
+        
+        return [
+            DetectedIntent(
+                intent_type=intent_type,
+                content=content,
+                confidence=confidence,
+                context=text[:200],  # Truncate for storage
+                created_at=now_iso,
+                source=source
+            )
+            for intent_type, content, confidence in self._match(text)
+            if confidence >= self.confidence_threshold
+        ]
+    
+    def _match_text(self, text: str) -> Tuple[Tuple[str, str, float], ...]:
+        """
+        Find unique (intent_type, content, confidence) matches in text.
         
+        Returns an immutable tuple so results can be cached.
+        """
         if len(text) < 3:
-            return intents
-        
-        for intent_type, patterns in INTENT_PATTERNS.items():
-            for pattern in patterns:
-                matches = re.finditer(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    content = match.group(1).strip() if match.groups() else text
-                    
-                    # Calculate confidence based on pattern match quality
-                    confidence = self._calculate_confidence(
-                        text, pattern, content, intent_type
-                    )
-                    
-                    if confidence >= self.confidence_threshold:
-                        intent = DetectedIntent(
-                            intent_type=intent_type,
-                            content=content,
-                            confidence=confidence,
-                            context=text[:200],  # Truncate for storage
-                            created_at=datetime.utcnow().isoformat(),
-                            source=source
-                        )
-                        intents.append(intent)
-        
-        # Remove duplicates (same content + type)
-        seen = set()
-        unique_intents = []
-        for intent in intents:
-            key = (intent.intent_type, intent.content.lower())
-            if key not in seen:
-                seen.add(key)
-                unique_intents.append(intent)
+            return ()
+        
+        text_lower = text.lower()
+        if not ANY_TRIGGER_RE.search(text_lower):
+            return ()
+        
+        # Keyed by (intent_type, content.lower()) so duplicates are dropped
+        # as they are found; dicts keep first-seen order.
+        unique: Dict[Tuple[str, str], Tuple[str, str, float]] = {}
         
-        return unique_intents
+        for intent_type, fused in INTENT_PATTERNS_FUSED.items():
+            if not any(t in text_lower for t in INTENT_TRIGGERS[intent_type]):
+                continue
+            
+            patterns = INTENT_PATTERNS[intent_type]
+            for match in fused.finditer(text):
+                content = match.group(match.lastindex + 1)[:CONTENT_MAX_LEN].strip()
+                key = (intent_type, content.lower())
+                if key in unique:
+                    continue
+                
+                # lastgroup is the branch that fired (p0, p1, ...);
+                # its capture group is the next one
+                pattern = patterns[int(match.lastgroup[1:])]
+                
+                # Calculate confidence based on pattern match quality
+                confidence = self._calculate_confidence(
+                    text, pattern, content, intent_type
+                )
+                unique[key] = (intent_type, content, confidence)
+        
+        return tuple(unique.values())
     
     def _calculate_confidence(
         self, 
@@ -215,22 +311,12 @@ class IntentDetector:
         }
         
         # Extract dates
-        date_patterns = [
-            r"(明天|今天|后天|大后天)",
-            r"(\d+月\d+日)",
-            r"(\d+/\d+)",
-        ]
-        for pattern in date_patterns:
-            matches = re.findall(pattern, text)
-            entities["dates"].extend(matches)
+        for pattern in DATE_PATTERNS:
+            entities["dates"].extend(pattern.findall(text))
         
-        # Extract common tool names
-        tools = ["python", "javascript", "react", "vue", "fastapi", "flask", 
-                 "docker", "kubernetes", "postgresql", "mongodb", "redis"]
-        text_lower = text.lower()
-        for tool in tools:
-            if tool in text_lower:
-                entities["tools"].append(tool)
+        # Extract common tool names (reported once each, in TOOLS order)
+        found = {m.lower() for m in TOOLS_RE.findall(text)}
+        entities["tools"] = [tool for tool in TOOLS if tool in found]
         
         return entities
 
@@ -239,6 +325,83 @@ class IntentDetector:
 # Todo Manager
 # ============================================================================
 
+def _json_dumps(obj) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+def _json_loads(data: bytes):
+    """Parse JSON from bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Seeded from the clock in milliseconds so ids from separate runs don't
+# collide; within a process the counter guarantees uniqueness.
+_ID_COUNTER = itertools.count(int(time.time() * 1000))
+
+
+def _next_id(prefix: str) -> str:
+    """Return a new id like ``todo_18c2f4a9b1e``."""
+    return f"{prefix}_{next(_ID_COUNTER):x}"
+
+
+def _iso_to_ts(value: Optional[str]) -> Optional[float]:
+    """Convert a naive UTC ISO timestamp to epoch seconds."""
+    if value is None:
+        return None
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+
+
+def _reminder_due(
+    created_ts: float,
+    last_ts: Optional[float],
+    reminder_count: int,
+    now_ts: float
+) -> bool:
+    """
+    Reminder schedule for a pending todo (all times in epoch seconds).
+    
+    - First reminder: 24 hours after creation
+    - Second reminder: 48 hours after the first
+    - After that: weekly
+    """
+    if last_ts is None:
+        return now_ts - created_ts >= 24 * 3600
+    if reminder_count < 2:
+        return now_ts - last_ts >= 48 * 3600
+    return now_ts - last_ts >= 168 * 3600
+
+
+# path -> (mtime_ns, size, raw bytes) of the last read; one entry per path,
+# so older versions of a file are not kept alive
+_FILE_CACHE: Dict[str, Tuple[int, int, bytes]] = {}
+
+
+def _read_file_cached(path: str, mtime_ns: int, size: int) -> bytes:
+    """
+    Read a file's raw bytes.
+    
+    TodoManagers created in the same process share one read until the
+    file's modification time or size changes. Parsing happens per caller,
+    so no mutable state is shared.
+    """
+    cached = _FILE_CACHE.get(path)
+    if cached is not None and cached[0] == mtime_ns and cached[1] == size:
+        return cached[2]
+    with open(path, 'rb') as f:
+        data = f.read()
+    _FILE_CACHE[path] = (mtime_ns, size, data)
+    return data
+
+
+# Compact todos.jsonl once it holds this many lines per live todo
+TODO_LOG_COMPACT_RATIO = 4
+
+
 class TodoManager:
     """Manages todo items and follow-up reminders."""
     
@@ -246,32 +409,132 @@ class TodoManager:
         self.data_dir = data_dir or "/home/tars/Workspace/safeclaw/data"
         os.makedirs(self.data_dir, exist_ok=True)
         
-        self.todos_file = os.path.join(self.data_dir, "todos.json")
-        self.intents_file = os.path.join(self.data_dir, "detected_intents.json")
-        self.progress_file = os.path.join(self.data_dir, "progress_notes.json")
+        self.todos_file = os.path.join(self.data_dir, "todos.jsonl")
+        self.intents_file = os.path.join(self.data_dir, "detected_intents.jsonl")
+        self.progress_file = os.path.join(self.data_dir, "progress_notes.jsonl")
         
         self._load_data()
     
     def _load_data(self):
-        """Load data from files."""
-        self.todos = self._load_json(self.todos_file, {})
-        self.intents = self._load_json(self.intents_file, [])
-        self.progress = self._load_json(self.progress_file, [])
-    
-    def _load_json(self, filepath: dict) -> dict:
-        """Load JSON data from file."""
-        if os.path.exists(filepath):
+        """
+        Load data from files.
+        
+        Each file is an append-only JSONL log. Todos are replayed into a
+        dict keyed by id; later records (full todos or partial updates)
+        overwrite the fields of earlier ones.
+        """
+        self.todos = {}
+        todo_records = self._load_jsonl(self.todos_file)
+        for record in todo_records:
+            todo = self.todos.get(record['id'])
+            if todo is None:
+                self.todos[record['id']] = record
+            else:
+                todo.update(record)
+        self._todo_log_lines = len(todo_records)
+        
+        # Secondary indexes over pending todos: ids in insertion order
+        # (dict used as an ordered set) and a (due, due_at, id) min-heap.
+        # Heap entries go stale lazily; _due_indexed holds the due_at each
+        # todo currently has an entry for.
+        self._pending_ids: Dict[str, None] = {}
+        self._due_heap: List[Tuple[datetime, str, str]] = []
+        self._due_indexed: Dict[str, str] = {}
+        # Lowercased titles, for substring similarity checks
+        self._title_lower: Dict[str, str] = {}
+        # (created_at, last_reminded_at) as epoch seconds, so reminder
+        # checks don't parse ISO strings
+        self._ts: Dict[str, Tuple[float, Optional[float]]] = {}
+        for todo in self.todos.values():
+            self._index_todo(todo)
+        
+        self.intents = self._load_jsonl(self.intents_file)
+        self.progress = self._load_jsonl(self.progress_file)
+        
+        self._maybe_compact_todos()
+    
+    def _load_jsonl(self, filepath: str) -> List[Dict]:
+        """Load JSONL records from file, skipping unreadable lines."""
+        records = []
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            return records
+        
+        data = _read_file_cached(filepath, stat.st_mtime_ns, stat.st_size)
+        if data and not data.endswith(b"\n"):
+            # Torn last write: terminate it so the next append starts on a
+            # line of its own instead of being glued to the fragment
+            with open(filepath, 'ab') as f:
+                f.write(b"\n")
+        for line in data.splitlines():
+            if not line.strip():
+                continue
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
+                records.append(_json_loads(line))
+            except ValueError:
                 pass
-        return default if isinstance(default, (dict, list)) else {}
+        return records
+    
+    def _append_json(self, filepath: str, record: Dict):
+        """Append a single JSON record to a JSONL file."""
+        with open(filepath, 'ab') as f:
+            f.write(_json_dumps(record) + b"\n")
+    
+    def _save_jsonl(self, filepath: str, records):
+        """Rewrite a JSONL file from scratch (used for compaction)."""
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            for record in records:
+                f.write(_json_dumps(record) + b"\n")
+        os.replace(tmp_path, filepath)
+    
+    def _index_todo(self, todo: Dict):
+        """Keep the pending, due-date and title indexes in sync with a todo."""
+        todo_id = todo['id']
+        self._title_lower[todo_id] = todo['title'].lower()
+        self._ts[todo_id] = (
+            _iso_to_ts(todo['created_at']),
+            _iso_to_ts(todo['last_reminded_at'])
+        )
+        if todo['status'] != 'pending':
+            self._pending_ids.pop(todo_id, None)
+            return
+        
+        self._pending_ids[todo_id] = None
+        due_at = todo['due_at']
+        if not due_at:
+            # Cleared due date; any heap entry left behind is now stale
+            self._due_indexed.pop(todo_id, None)
+        elif self._due_indexed.get(todo_id) != due_at:
+            heapq.heappush(
+                self._due_heap,
+                (datetime.fromisoformat(due_at), due_at, todo_id)
+            )
+            self._due_indexed[todo_id] = due_at
+    
+    def _save_todo(self, todo: Dict, fields: Tuple[str, ...] = None):
+        """
+        Persist the latest version of a todo.
+        
+        If ``fields`` is given only those fields (plus the id) are appended.
+        """
+        self._index_todo(todo)
+        if fields is not None:
+            record = {'id': todo['id']}
+            for key in fields:
+                record[key] = todo[key]
+        else:
+            record = todo
+        self._append_json(self.todos_file, record)
+        self._todo_log_lines += 1
+        self._maybe_compact_todos()
     
-    def _save_json(self, filepath: str, data):
-        """Save JSON data to file."""
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    def _maybe_compact_todos(self):
+        """Rewrite the todo log as a snapshot once it holds too many stale versions."""
+        if self._todo_log_lines > TODO_LOG_COMPACT_RATIO * max(len(self.todos), 1):
+            self._save_jsonl(self.todos_file, self.todos.values())
+            self._todo_log_lines = len(self.todos)
     
     def create_todo(
         self,
@@ -279,9 +542,10 @@ class TodoManager:
         priority: int = 3
     ) -> TodoItem:
         """Create a todo from detected intent."""
-        import uuid
-        
-        todo_id = f"todo_{uuid.uuid4().hex[:8]}"
+        todo_id = _next_id("todo")
+        while todo_id in self.todos:
+            todo_id = _next_id("todo")
+        now = datetime.utcnow().isoformat()
         
         # Determine title based on intent type
         if intent.intent_type == "project":
@@ -301,8 +565,8 @@ class TodoManager:
             context=intent.context,
             status="pending",
             priority=priority,
-            created_at=datetime.utcnow().isoformat(),
-            updated_at=datetime.utcnow().isoformat(),
+            created_at=now,
+            updated_at=now,
             due_at=None,
             last_reminded_at=None,
             reminder_count=0,
@@ -311,14 +575,14 @@ class TodoManager:
         
         # Save
         self.todos[todo_id] = asdict(todo)
-        self._save_json(self.todos_file, self.todos)
+        self._save_todo(self.todos[todo_id])
         
         # Also save intent
         intent_data = asdict(intent)
-        intent_data['id'] = f"intent_{uuid.uuid4().hex[:8]}"
+        intent_data['id'] = _next_id("intent")
         intent_data['related_todo_id'] = todo_id
         self.intents.append(intent_data)
-        self._save_json(self.intents_file, self.intents)
+        self._append_json(self.intents_file, intent_data)
         
         return todo
     
@@ -339,7 +603,7 @@ class TodoManager:
         
         todo['updated_at'] = datetime.utcnow().isoformat()
         self.todos[todo_id] = todo
-        self._save_json(self.todos_file, self.todos)
+        self._save_todo(todo)
         
         return TodoItem(**todo)
     
@@ -358,10 +622,8 @@ class TodoManager:
         source: str = "user"
     ) -> ProgressNote:
         """Add a progress note to a todo."""
-        import uuid
-        
         note = ProgressNote(
-            id=f"note_{uuid.uuid4().hex[:8]}",
+            id=_next_id("note"),
             todo_id=todo_id,
             content=content,
             created_at=datetime.utcnow().isoformat(),
@@ -369,14 +631,23 @@ class TodoManager:
         )
         
         # Save
-        self.progress.append(asdict(note))
-        self._save_json(self.progress_file, self.progress)
+        note_data = asdict(note)
+        self.progress.append(note_data)
+        self._append_json(self.progress_file, note_data)
         
         # Update todo
         self.update_todo(todo_id, status="in_progress")
         
         return note
     
+    def find_pending_by_title(self, query: str) -> Optional[TodoItem]:
+        """Find the first pending todo whose title contains query (case-insensitive)."""
+        query = query.lower()
+        for todo_id in self._pending_ids:
+            if query in self._title_lower[todo_id]:
+                return TodoItem(**self.todos[todo_id])
+        return None
+    
     def get_pending_todos(
         self, 
         intent_type: str = None,
@@ -384,31 +655,44 @@ class TodoManager:
     ) -> List[TodoItem]:
         """Get pending todos, optionally filtered by type."""
         todos = []
-        for todo_data in self.todos.values():
-            if todo_data['status'] == 'pending':
-                if intent_type is None or todo_data['intent_type'] == intent_type:
-                    todos.append(TodoItem(**todo_data))
+        for todo_id in self._pending_ids:
+            todo_data = self.todos[todo_id]
+            if intent_type is None or todo_data['intent_type'] == intent_type:
+                todos.append(todo_data)
         
-        # Sort by priority and creation time
-        todos.sort(key=lambda x: (-x.priority, x.created_at))
+        # Sort by priority and creation time on the raw dicts; only the
+        # returned slice is turned into TodoItems
+        todos.sort(key=lambda d: (-d['priority'], d['created_at']))
         
-        return todos[:limit]
+        return [TodoItem(**todo_data) for todo_data in todos[:limit]]
     
     def get_overdue_todos(self) -> List[TodoItem]:
-        """Get todos past their due date."""
-        todos = []
+        """Get todos past their due date, earliest first."""
         now = datetime.utcnow()
+        overdue = {}
+        
+        # Pop everything already due, drop stale entries, put the rest back
+        while self._due_heap and self._due_heap[0][0] < now:
+            entry = heapq.heappop(self._due_heap)
+            _, due_at, todo_id = entry
+            if self._due_indexed.get(todo_id) != due_at or todo_id in overdue:
+                continue  # Superseded by a newer due date
+            if self.todos[todo_id]['status'] != 'pending':
+                del self._due_indexed[todo_id]
+                continue
+            overdue[todo_id] = entry
         
-        for todo_data in self.todos.values():
-            if todo_data['status'] == 'pending' and todo_data['due_at']:
-                due = datetime.fromisoformat(todo_data['due_at'])
-                if due < now:
-                    todos.append(TodoItem(**todo_data))
+        for entry in overdue.values():
+            heapq.heappush(self._due_heap, entry)
         
-        return todos
+        return [TodoItem(**self.todos[todo_id]) for todo_id in overdue]
     
-    def should_remind(self, todo_id: str) -> bool:
-        """Check if a todo should be reminded."""
+    def should_remind(self, todo_id: str, now_ts: float = None) -> bool:
+        """
+        Check if a todo should be reminded.
+        
+        ``now_ts`` (epoch seconds) lets a sweep share a single clock read.
+        """
         if todo_id not in self.todos:
             return False
         
@@ -417,47 +701,48 @@ class TodoManager:
         if todo['status'] != 'pending':
             return False
         
-        # Reminder logic:
-        # - First reminder: 24 hours after creation
-        # - Second reminder: 72 hours after creation
-        # - Third reminder: 168 hours (1 week) after creation
-        # - After that: weekly
-        
-        created = datetime.fromisoformat(todo['created_at'])
-        now = datetime.utcnow()
-        hours_elapsed = (now - created).total_seconds() / 3600
-        
-        if todo['last_reminded_at'] is None:
-            return hours_elapsed >= 24
-        else:
-            last = datetime.fromisoformat(todo['last_reminded_at'])
-            hours_since_remind = (now - last).total_seconds() / 3600
-            
-            if todo['reminder_count'] < 2:
-                return hours_since_remind >= 48
-            else:
-                return hours_since_remind >= 168
+        if now_ts is None:
+            now_ts = time.time()
+        created_ts, last_ts = self._ts[todo_id]
+        return _reminder_due(created_ts, last_ts, todo['reminder_count'], now_ts)
     
     def get_reminder_candidates(self) -> List[TodoItem]:
         """Get todos that should be reminded now."""
+        # One clock read and one pass over the pending index, with the
+        # timestamp table and rule bound locally
+        now_ts = time.time()
+        todos = self.todos
+        ts = self._ts
+        due = _reminder_due
+        
         candidates = []
-        for todo_id in self.todos:
-            if self.should_remind(todo_id):
-                candidates.append(TodoItem(**self.todos[todo_id]))
+        for todo_id in self._pending_ids:
+            todo = todos[todo_id]
+            created_ts, last_ts = ts[todo_id]
+            if due(created_ts, last_ts, todo['reminder_count'], now_ts):
+                candidates.append(TodoItem(**todo))
         return candidates
     
     def mark_reminded(self, todo_id: str):
         """Mark a todo as reminded."""
         if todo_id in self.todos:
-            self.todos[todo_id]['last_reminded_at'] = datetime.utcnow().isoformat()
-            self.todos[todo_id]['reminder_count'] += 1
-            self._save_json(self.todos_file, self.todos)
+            todo = self.todos[todo_id]
+            todo['last_reminded_at'] = datetime.utcnow().isoformat()
+            todo['reminder_count'] += 1
+            self._save_todo(todo, ('last_reminded_at', 'reminder_count'))
 
 
 # ============================================================================
 # Intent-Aware Conversation
 # ============================================================================
 
+# Keywords are all CJK, so no case folding is needed
+FOLLOW_UP_TRIGGERS_RE = re.compile(
+    "天气|你好|在吗|忙吗|怎样|怎么样|今天|这周|最近"
+)
+TASK_KEYWORDS_RE = re.compile("做|写|开发|完成|实现|测试")
+
+
 class IntentAwareAssistant:
     """
     Assistant that detects intents and manages follow-ups.
@@ -512,15 +797,8 @@ class IntentAwareAssistant:
     
     def _find_similar_todo(self, intent: DetectedIntent) -> Optional[TodoItem]:
         """Find existing similar todo."""
-        for todo_data in self.todo_manager.todos.values():
-            if todo_data['status'] != 'pending':
-                continue
-            
-            # Check content similarity
-            if intent.content.lower() in todo_data['title'].lower():
-                return TodoItem(**todo_data)
-        
-        return None
+        # Check content similarity
+        return self.todo_manager.find_pending_by_title(intent.content)
     
     def _calculate_priority(self, intent: DetectedIntent) -> int:
         """Calculate priority based on intent type."""
@@ -545,25 +823,17 @@ class IntentAwareAssistant:
         # - Casual greetings
         # - Questions not related to existing todos
         
-        follow_up_triggers = [
-            "天气", "你好", "在吗", "忙吗", "怎样", "怎么样",
-            "今天", "这周", "最近"
-        ]
-        
-        text_lower = text.lower()
-        
         # Not a follow-up opportunity if:
         # - Message is very long (user is doing actual work)
         # - Message contains task-related keywords
         if len(text) > 100:
             return False
         
-        task_keywords = ["做", "写", "开发", "完成", "实现", "测试"]
-        if any(kw in text_lower for kw in task_keywords):
+        if TASK_KEYWORDS_RE.search(text):
             return False
         
         # Good opportunity if it starts with casual text
-        return any(text_lower.startswith(trigger) for trigger in follow_up_triggers)
+        return FOLLOW_UP_TRIGGERS_RE.match(text) is not None
     
     def get_follow_up_message(self) -> Optional[str]:
         """Generate a natural follow-up message."""
@@ -7,10 +7,25 @@ Tracks daily habits and provides regular encouragement.
 import re
 import json
 import os
+import mmap
+import uuid
+import contextlib
+import random
+from array import array
+from itertools import compress
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from typing import List, Optional, Dict, Tuple
 
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used as a fallback
+    orjson = None
+
+# State files are written compactly; set SAFECLAW_JSON_PRETTY=1 to indent
+# them for debugging
+JSON_PRETTY = os.environ.get("SAFECLAW_JSON_PRETTY") == "1"
+
 
 HABIT_CATEGORIES = {
     "fitness": {
@@ -45,8 +60,54 @@ HABIT_CATEGORIES = {
     },
 }
 
+# Message signals checked by HabitAwareAssistant.process_message
+COMPLETION_SIGNALS = ("做完了", "完成了", "练完了", "背完了", "跑了", "打了卡")
+STOP_SIGNALS = ("不练了", "不跑了", "放弃了", "停止提醒", "别提醒了")
+HABIT_KEYWORDS = ("健身", "跑步", "运动", "背单词", "读书", "减肥", "早睡")
+CASUAL_SIGNALS = ("天气", "在吗", "最近", "今天")
+
+# All signals in one overlapping scan: the lookahead lets a match start at
+# every position, so e.g. "不跑了" yields both "不跑了" and "跑了".
+SIGNAL_BUCKETS = {
+    **dict.fromkeys(COMPLETION_SIGNALS, "completion"),
+    **dict.fromkeys(STOP_SIGNALS, "stop"),
+    **dict.fromkeys(HABIT_KEYWORDS, "habit"),
+    **dict.fromkeys(CASUAL_SIGNALS, "casual"),
+}
+SIGNALS_RE = re.compile(
+    "(?=(" + "|".join(map(re.escape, sorted(SIGNAL_BUCKETS, key=len, reverse=True))) + "))"
+)
+
+# keyword -> category, first category listing a keyword wins
+KEYWORD_CATEGORY = {}
+for _category, _info in HABIT_CATEGORIES.items():
+    for _kw in _info["keywords"]:
+        KEYWORD_CATEGORY.setdefault(_kw, _category)
+
+# Response templates, filled with str.format after one is picked
+LOG_MESSAGES = (
+    "太棒了！完成{name}！",
+    "意志力+1！坚持第{streak}天！",
+    "打卡成功！习惯养成中！",
+)
+FOLLOW_UP_MESSAGES = (
+    "提醒一下，{name}今天还没做哦~",
+    "{name}今日目标：{target_value}{unit}，加油！",
+)
+
+# Habit logs are compacted on load once the NDJSON file holds this many
+# lines per live entry
+HABIT_LOG_COMPACT_RATIO = 4
+
 
-@dataclass
+def _dumps_line(record: Dict) -> bytes:
+    """Serialize one record as an NDJSON line."""
+    if orjson is not None:
+        return orjson.dumps(record) + b"\n"
+    return json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n"
+
+
+@dataclass(slots=True)
 class Habit:
     """A tracked habit."""
     id: str
@@ -69,7 +130,7 @@ class Habit:
     cancel_reason: Optional[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class HabitLog:
     """A single habit log entry."""
     id: str
@@ -89,26 +150,145 @@ class HabitManager:
         os.makedirs(self.data_dir, exist_ok=True)
         
         self.habits_file = os.path.join(self.data_dir, "habits.json")
-        self.logs_file = os.path.join(self.data_dir, "habit_logs.json")
+        self.logs_file = os.path.join(self.data_dir, "habit_logs.ndjson")
+        self.legacy_logs_file = os.path.join(self.data_dir, "habit_logs.json")
         
         self.habits = self._load_json(self.habits_file, {})
-        self.logs = self._load_json(self.logs_file, [])
+        
+        # (habit_id, date) -> log entry, and date -> ids logged that day
+        self.logs: List[Dict] = []
+        self._log_index: Dict[Tuple[str, str], Dict] = {}
+        self._logged_by_date: Dict[str, set] = {}
+        self._load_logs()
+        
+        # Columnar copies of the fields get_dashboard aggregates over, and
+        # the active habit ids in insertion order (dict used as an ordered
+        # set). The habit dicts stay the source of truth and are what gets
+        # saved.
+        self._row: Dict[str, int] = {}
+        self._streaks = array('i')
+        self._active = bytearray()
+        self._active_ids: Dict[str, None] = {}
+        for habit in self.habits.values():
+            self._index_habit(habit)
+        
+        # Each mutating call writes its dirty files before returning; inside
+        # a batch() block the writes are deferred to the end of the block.
+        self._habits_dirty = False
+        self._batch_depth = 0
     
     def _load_json(self, filepath: str, default):
         if os.path.exists(filepath):
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                # Parse straight from a read-only mapping; orjson reads it
+                # through a memoryview without copying it into a bytes object
+                with open(filepath, 'rb') as f, \
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if orjson is not None:
+                        with memoryview(mm) as view:
+                            return orjson.loads(view)
+                    return json.loads(mm[:])
             except:
                 pass
         return default
     
     def _save_json(self, filepath: str, data):
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS
+            if JSON_PRETTY:
+                option |= orjson.OPT_INDENT_2
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(data, option=option))
+            return
         with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+            if JSON_PRETTY:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            else:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    
+    def _load_logs(self):
+        """
+        Replay the append-only NDJSON log. A later record for the same
+        (habit_id, date) supersedes the earlier one. The old JSON array
+        file is read once and converted if no NDJSON log exists yet.
+        """
+        if os.path.exists(self.logs_file):
+            with open(self.logs_file, 'rb') as f:
+                lines = f.read().splitlines()
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    self._add_log(orjson.loads(line) if orjson is not None else json.loads(line))
+                except ValueError:
+                    pass
+            self._log_lines = len(lines)
+            if self._log_lines > HABIT_LOG_COMPACT_RATIO * max(len(self.logs), 1):
+                self._rewrite_logs()
+        else:
+            for log in self._load_json(self.legacy_logs_file, []):
+                self._add_log(log)
+            self._rewrite_logs()
+    
+    def _add_log(self, log: Dict):
+        key = (log["habit_id"], log["date"])
+        existing = self._log_index.get(key)
+        if existing is not None:
+            existing.update(log)
+            return
+        self.logs.append(log)
+        self._log_index[key] = log
+        self._logged_by_date.setdefault(log["date"], set()).add(log["habit_id"])
+    
+    def _append_log(self, log: Dict):
+        with open(self.logs_file, 'ab') as f:
+            f.write(_dumps_line(log))
+        self._log_lines += 1
+    
+    def _rewrite_logs(self):
+        tmp_path = self.logs_file + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.writelines(_dumps_line(log) for log in self.logs)
+        os.replace(tmp_path, self.logs_file)
+        self._log_lines = len(self.logs)
+    
+    def _index_habit(self, habit: Dict):
+        row = self._row.get(habit["id"])
+        if row is None:
+            row = self._row[habit["id"]] = len(self._streaks)
+            self._streaks.append(0)
+            self._active.append(0)
+        self._streaks[row] = habit["streak"]
+        self._active[row] = habit["status"] == "active"
+        if habit["status"] == "active":
+            self._active_ids[habit["id"]] = None
+        else:
+            self._active_ids.pop(habit["id"], None)
+    
+    def _mark_dirty(self, habits: bool = False):
+        """Record unsaved changes and write them unless a batch is open."""
+        self._habits_dirty = self._habits_dirty or habits
+        if not self._batch_depth:
+            self.flush()
+    
+    @contextlib.contextmanager
+    def batch(self):
+        """Defer writes to the end of the block, so a burst is saved once."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
+    
+    def flush(self):
+        """Write habits to disk if they have unsaved changes."""
+        if self._habits_dirty:
+            self._save_json(self.habits_file, self.habits)
+            self._habits_dirty = False
     
     def create_habit(self, category: str, name: str, target_value: float = None, unit: str = "次") -> Tuple[Habit, str]:
-        import uuid
         habit_id = f"habit_{uuid.uuid4().hex[:8]}"
         
         category_info = HABIT_CATEGORIES.get(category, HABIT_CATEGORIES["fitness"])
@@ -116,6 +296,7 @@ class HabitManager:
             target_value = category_info["templates"][0]["duration_min"]
             unit = category_info["templates"][0]["unit"]
         
+        now_iso = datetime.utcnow().isoformat()
         habit = Habit(
             id=habit_id,
             name=name,
@@ -125,40 +306,43 @@ class HabitManager:
             target_value=target_value or 1,
             unit=unit,
             reminder_times=category_info["reminder_times"],
-            start_date=datetime.utcnow().isoformat(),
+            start_date=now_iso,
             status="active",
             streak=0,
             longest_streak=0,
             total_completed=0,
             last_completed_date=None,
-            created_at=datetime.utcnow().isoformat(),
-            updated_at=datetime.utcnow().isoformat(),
+            created_at=now_iso,
+            updated_at=now_iso,
             stop_date=None,
             cancel_reason=None
         )
         
         self.habits[habit_id] = asdict(habit)
-        self._save_json(self.habits_file, self.habits)
+        self._index_habit(self.habits[habit_id])
+        self._mark_dirty(habits=True)
         
         intro = f"好的！我来帮你养成{name}这个习惯。\n目标：每日{target_value}{unit}\n坚持就是胜利！"
         return habit, intro
     
     def log_habit(self, habit_id: str, completed: bool = True, value: float = None, notes: str = "") -> Tuple[bool, str]:
-        import uuid
         if habit_id not in self.habits:
             return False, "习惯不存在"
         
         habit = self.habits[habit_id]
-        today = datetime.utcnow().strftime("%Y-%m-%d")
+        now = datetime.utcnow()
+        now_iso = now.isoformat()
+        today = now.strftime("%Y-%m-%d")
+        yesterday = (now - timedelta(days=1)).strftime("%Y-%m-%d")
         
         # Check if already logged today
-        for log in self.logs:
-            if log["habit_id"] == habit_id and log["date"] == today:
-                log["completed"] = completed
-                log["value"] = value or habit["target_value"]
-                log["notes"] = notes
-                self._save_json(self.logs_file, self.logs)
-                return True, f"已更新今日记录！"
+        log = self._log_index.get((habit_id, today))
+        if log is not None:
+            log["completed"] = completed
+            log["value"] = value or habit["target_value"]
+            log["notes"] = notes
+            self._append_log(log)
+            return True, f"已更新今日记录！"
         
         log_entry = {
             "id": f"log_{uuid.uuid4().hex[:8]}",
@@ -167,15 +351,15 @@ class HabitManager:
             "completed": completed,
             "value": value or habit["target_value"],
             "notes": notes,
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": now_iso
         }
-        self.logs.append(log_entry)
+        self._add_log(log_entry)
+        self._append_log(log_entry)
         
         if completed:
             habit["total_completed"] += 1
             habit["last_completed_date"] = today
             
-            yesterday = (datetime.utcnow() - timedelta(days=1)).strftime("%Y-%m-%d")
             last_date = habit.get("last_completed_date")
             if last_date == yesterday:
                 habit["streak"] += 1
@@ -185,17 +369,16 @@ class HabitManager:
             if habit["streak"] > habit["longest_streak"]:
                 habit["longest_streak"] = habit["streak"]
         
-        habit["updated_at"] = datetime.utcnow().isoformat()
-        self._save_json(self.habits_file, self.habits)
-        self._save_json(self.logs_file, self.logs)
+        habit["updated_at"] = now_iso
+        self._index_habit(habit)
+        # The log line is already on disk, and a reload treats the day as
+        # logged, so the counters it implies are written now, batch or not
+        self._habits_dirty = True
+        self.flush()
         
-        messages = [
-            f"太棒了！完成{name}！",
-            f"意志力+1！坚持第{habit['streak']}天！",
-            f"打卡成功！习惯养成中！",
-        ]
-        import random
-        return True, random.choice(messages)
+        return True, random.choice(LOG_MESSAGES).format(
+            name=habit["name"], streak=habit["streak"]
+        )
     
     def stop_habit(self, habit_id: str, reason: str = "用户主动停止") -> bool:
         if habit_id not in self.habits:
@@ -204,28 +387,33 @@ class HabitManager:
         self.habits[habit_id]["status"] = "cancelled"
         self.habits[habit_id]["stop_date"] = datetime.utcnow().isoformat()
         self.habits[habit_id]["cancel_reason"] = reason
-        self._save_json(self.habits_file, self.habits)
+        self._index_habit(self.habits[habit_id])
+        self._mark_dirty(habits=True)
         return True
     
+    def iter_active_habits(self):
+        """Yield (habit_id, habit dict) for active habits, oldest first."""
+        for habit_id in self._active_ids:
+            yield habit_id, self.habits[habit_id]
+    
     def get_active_habits(self) -> List[Habit]:
-        return [Habit(**h) for h in self.habits.values() if h["status"] == "active"]
+        return [Habit(**self.habits[hid]) for hid in self._active_ids]
     
-    def get_pending_habits(self) -> List[Habit]:
-        today = datetime.utcnow().strftime("%Y-%m-%d")
-        completed_ids = {log["habit_id"] for log in self.logs if log["date"] == today}
-        return [Habit(**h) for h in self.habits.values() if h["status"] == "active" and h["id"] not in completed_ids]
+    def get_pending_habits(self, today: str = None) -> List[Habit]:
+        today = today or datetime.utcnow().strftime("%Y-%m-%d")
+        completed_ids = self._logged_by_date.get(today, ())
+        return [Habit(**self.habits[hid]) for hid in self._active_ids if hid not in completed_ids]
     
     def get_dashboard(self) -> Dict:
         today = datetime.utcnow().strftime("%Y-%m-%d")
-        today_logs = [log for log in self.logs if log["date"] == today]
-        pending = self.get_pending_habits()
+        pending = self.get_pending_habits(today)
         
         return {
             "total_habits": len(self.habits),
-            "active_habits": len([h for h in self.habits.values() if h["status"] == "active"]),
-            "completed_today": len(today_logs),
+            "active_habits": len(self._active_ids),
+            "completed_today": len(self._logged_by_date.get(today, ())),
             "pending_today": len(pending),
-            "total_streak": sum(h["streak"] for h in self.habits.values() if h["status"] == "active")
+            "total_streak": sum(compress(self._streaks, self._active))
         }
 
 
@@ -236,11 +424,13 @@ class HabitAwareAssistant:
     def process_message(self, text: str) -> Dict:
         result = {"action": "none", "response": None, "habit_id": None, "data": {}}
         
+        found = {m.group(1) for m in SIGNALS_RE.finditer(text)}
+        buckets = {SIGNAL_BUCKETS[kw] for kw in found}
+        
         # Check for completion
-        completion_signals = ["做完了", "完成了", "练完了", "背完了", "跑了", "打了卡"]
-        if any(signal in text for signal in completion_signals):
-            for habit_id, habit in self.habit_manager.habits.items():
-                if habit["status"] == "active" and habit["name"] in text:
+        if "completion" in buckets:
+            for habit_id, habit in self.habit_manager.iter_active_habits():
+                if habit["name"] in text:
                     success, message = self.habit_manager.log_habit(habit_id)
                     if success:
                         result["action"] = "log_habit"
@@ -249,40 +439,33 @@ class HabitAwareAssistant:
                         return result
         
         # Check for stop signal
-        stop_signals = ["不练了", "不跑了", "放弃了", "停止提醒", "别提醒了"]
-        if any(signal in text for signal in stop_signals):
-            for habit_id, habit in self.habit_manager.habits.items():
-                if habit["status"] == "active":
-                    self.habit_manager.stop_habit(habit_id)
-                    result["action"] = "stop_habit"
-                    result["response"] = f"好的，已停止{habit['name']}的提醒。"
-                    return result
+        if "stop" in buckets:
+            for habit_id, habit in self.habit_manager.iter_active_habits():
+                self.habit_manager.stop_habit(habit_id)
+                result["action"] = "stop_habit"
+                result["response"] = f"好的，已停止{habit['name']}的提醒。"
+                return result
         
         # Check for new habit
-        habit_keywords = ["健身", "跑步", "运动", "背单词", "读书", "减肥", "早睡"]
-        for kw in habit_keywords:
-            if kw in text:
-                for category, info in HABIT_CATEGORIES.items():
-                    if kw in info["keywords"]:
-                        habit, intro = self.habit_manager.create_habit(category, kw)
-                        result["action"] = "create_habit"
-                        result["response"] = intro
-                        result["habit_id"] = habit.id
-                        return result
+        if "habit" in buckets:
+            for kw in HABIT_KEYWORDS:
+                category = KEYWORD_CATEGORY.get(kw)
+                if kw in found and category is not None:
+                    habit, intro = self.habit_manager.create_habit(category, kw)
+                    result["action"] = "create_habit"
+                    result["response"] = intro
+                    result["habit_id"] = habit.id
+                    return result
         
         # Check for follow-up
-        casual_signals = ["天气", "在吗", "最近", "今天"]
-        if any(signal in text for signal in casual_signals):
+        if "casual" in buckets:
             pending = self.habit_manager.get_pending_habits()
             if pending:
                 habit = pending[0]
-                messages = [
-                    f"提醒一下，{habit.name}今天还没做哦~",
-                    f"{habit.name}今日目标：{habit.target_value}{habit.unit}，加油！",
-                ]
-                import random
                 result["action"] = "follow_up"
-                result["response"] = random.choice(messages)
+                result["response"] = random.choice(FOLLOW_UP_MESSAGES).format(
+                    name=habit.name, target_value=habit.target_value, unit=habit.unit
+                )
                 result["habit_id"] = habit.id
                 return result
         
@@ -6,10 +6,24 @@ Automatically detects user intentions and creates follow-up reminders.
 
 import re
 import json
+import heapq
 import os
-from datetime import datetime, timedelta
+import time
+import mmap
+import uuid
+import contextlib
+from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass, asdict
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple, NamedTuple
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used as a fallback
+    orjson = None
+
+# State files are written compactly; set SAFECLAW_JSON_PRETTY=1 to indent
+# them for debugging
+JSON_PRETTY = os.environ.get("SAFECLAW_JSON_PRETTY") == "1"
 
 
 # ============================================================================
@@ -74,14 +88,24 @@ INTENT_PATTERNS = {
     ]
 }
 
+# One alternation per intent type, compiled once at import. Branch i is the
+# named group p{i}; the pattern's own capture group follows it.
+# INTENT_PATTERNS keeps the raw strings.
+_FUSED_INTENT_PATTERNS = {
+    intent_type: re.compile(
+        "|".join(f"(?P<p{i}>{p})" for i, p in enumerate(patterns)),
+        re.IGNORECASE
+    )
+    for intent_type, patterns in INTENT_PATTERNS.items()
+}
+
 
 # ============================================================================
 # Data Classes
 # ============================================================================
 
-@dataclass
-class DetectedIntent:
-    """Detected intent from conversation."""
+class DetectedIntent(NamedTuple):
+    """Detected intent from conversation (a tuple: cheap to build per match)."""
     intent_type: str
     content: str
     confidence: float
@@ -90,7 +114,7 @@ class DetectedIntent:
     source: str
 
 
-@dataclass
+@dataclass(slots=True)
 class TodoItem:
     """Todo item for follow-up."""
     id: str
@@ -112,6 +136,40 @@ class TodoItem:
 # Intent Detector
 # ============================================================================
 
+# Extra confidence for intent types that are usually deliberate
+INTENT_TYPE_BONUS = {"project": 0.1, "decision": 0.1}
+
+
+def _confidence_core(content_len: int, starts_with_content: bool, type_bonus: float) -> float:
+    """Numeric part of the confidence score, free of string work."""
+    confidence = 0.6
+    if content_len > 3:
+        confidence += 0.1
+    if content_len > 10:
+        confidence += 0.1
+    if starts_with_content:
+        confidence += 0.1
+    return min(1.0, confidence + type_bonus)
+
+
+def _make_conf(intent_type: str):
+    """Build a confidence scorer with intent_type's bonus baked in."""
+    type_bonus = INTENT_TYPE_BONUS.get(intent_type, 0.0)
+    
+    def conf(text_lower: str, content_lower: str) -> float:
+        return _confidence_core(
+            len(content_lower),
+            text_lower.startswith(content_lower[:10]),
+            type_bonus
+        )
+    
+    return conf
+
+
+# intent_type -> conf(text_lower, content_lower)
+_CONF_FN = {intent_type: _make_conf(intent_type) for intent_type in INTENT_PATTERNS}
+
+
 class IntentDetector:
     """Detects user intentions from text."""
     
@@ -126,57 +184,69 @@ class IntentDetector:
         if len(text) < 3:
             return intents
         
-        for intent_type, patterns in INTENT_PATTERNS.items():
-            for pattern in patterns:
-                matches = re.finditer(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    content = match.group(1).strip() if match.groups() else text
-                    confidence = self._calculate_confidence(text, pattern, content, intent_type)
-                    
-                    if confidence >= self.confidence_threshold:
-                        intent = DetectedIntent(
-                            intent_type=intent_type,
-                            content=content,
-                            confidence=confidence,
-                            context=text[:200],
-                            created_at=datetime.utcnow().isoformat(),
-                            source=source
-                        )
-                        intents.append(intent)
-        
-        # Remove duplicates
+        # Duplicates are dropped before scoring; confidence depends only on
+        # the type and the content's length/prefix, so it's the same for all
+        # matches sharing a key.
+        now_iso = datetime.utcnow().isoformat()
+        text_lower = text.lower()
         seen = set()
-        unique_intents = []
-        for intent in intents:
-            key = (intent.intent_type, intent.content.lower())
-            if key not in seen:
+        for intent_type, fused in _FUSED_INTENT_PATTERNS.items():
+            conf = _CONF_FN[intent_type]
+            for match in fused.finditer(text):
+                content = match.group(match.lastindex + 1).strip()
+                content_lower = content.lower()
+                key = (intent_type, content_lower)
+                if key in seen:
+                    continue
                 seen.add(key)
-                unique_intents.append(intent)
-        
-        return unique_intents
-    
-    def _calculate_confidence(self, text: str, pattern: str, content: str, intent_type: str) -> float:
-        """Calculate confidence score."""
-        base_confidence = 0.6
-        
-        if len(content) > 3:
-            base_confidence += 0.1
-        if len(content) > 10:
-            base_confidence += 0.1
-        
-        if text.lower().startswith(content.lower()[:10]):
-            base_confidence += 0.1
-        
-        if intent_type in ["project", "decision"]:
-            base_confidence += 0.1
-        
-        return min(1.0, base_confidence)
+                
+                confidence = conf(text_lower, content_lower)
+                
+                if confidence >= self.confidence_threshold:
+                    intent = DetectedIntent(
+                        intent_type=intent_type,
+                        content=content,
+                        confidence=confidence,
+                        context=text[:200],
+                        created_at=now_iso,
+                        source=source
+                    )
+                    intents.append(intent)
+        
+        return intents
 
 
 # ============================================================================
 # Todo Manager
 # ============================================================================
 
+def _iso_to_ts(value: Optional[str]) -> Optional[float]:
+    """Convert a naive UTC ISO timestamp to epoch seconds."""
+    if value is None:
+        return None
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+
+
+def _reminder_due(
+    created_ts: float,
+    last_ts: Optional[float],
+    reminder_count: int,
+    now_ts: float
+) -> bool:
+    """
+    Reminder schedule for a pending todo (all times in epoch seconds).
+    
+    - First reminder: 24 hours after creation
+    - Second reminder: 48 hours after the first
+    - After that: weekly
+    """
+    if last_ts is None:
+        return now_ts - created_ts >= 24 * 3600
+    if reminder_count < 2:
+        return now_ts - last_ts >= 48 * 3600
+    return now_ts - last_ts >= 168 * 3600
+
+
 class TodoManager:
     """Manages todo items and follow-up reminders."""
     
@@ -189,26 +259,92 @@ class TodoManager:
         
         self.todos = self._load_json(self.todos_file, {})
         self.intents = self._load_json(self.intents_file, [])
+        
+        # todo_id -> (created_at, last_reminded_at) as epoch seconds, so
+        # reminder checks don't re-parse ISO strings, and the pending ids
+        # in insertion order (dict used as an ordered set)
+        self._ts: Dict[str, Tuple[float, Optional[float]]] = {}
+        self._pending_ids: Dict[str, None] = {}
+        for todo_id in self.todos:
+            self._index_todo(todo_id)
+        
+        # Each mutating call writes its dirty files before returning; inside
+        # a batch() block the writes are deferred to the end of the block.
+        self._todos_dirty = False
+        self._intents_dirty = False
+        self._batch_depth = 0
     
     def _load_json(self, filepath: str, default):
         """Load JSON data from file."""
         if os.path.exists(filepath):
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                # Parse straight from a read-only mapping; orjson reads it
+                # through a memoryview without copying it into a bytes object
+                with open(filepath, 'rb') as f, \
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if orjson is not None:
+                        with memoryview(mm) as view:
+                            return orjson.loads(view)
+                    return json.loads(mm[:])
             except:
                 pass
         return default
     
     def _save_json(self, filepath: str, data):
         """Save JSON data to file."""
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS
+            if JSON_PRETTY:
+                option |= orjson.OPT_INDENT_2
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(data, option=option))
+            return
         with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+            if JSON_PRETTY:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            else:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    
+    def _index_todo(self, todo_id: str):
+        todo = self.todos[todo_id]
+        self._ts[todo_id] = (
+            _iso_to_ts(todo['created_at']),
+            _iso_to_ts(todo['last_reminded_at'])
+        )
+        if todo['status'] == 'pending':
+            self._pending_ids[todo_id] = None
+        else:
+            self._pending_ids.pop(todo_id, None)
+    
+    def _mark_dirty(self, todos: bool = False, intents: bool = False):
+        """Record unsaved changes and write them unless a batch is open."""
+        self._todos_dirty = self._todos_dirty or todos
+        self._intents_dirty = self._intents_dirty or intents
+        if not self._batch_depth:
+            self.flush()
+    
+    @contextlib.contextmanager
+    def batch(self):
+        """Defer writes to the end of the block, so a burst is saved once."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
+    
+    def flush(self):
+        """Write todos/intents to disk if they have unsaved changes."""
+        if self._todos_dirty:
+            self._save_json(self.todos_file, self.todos)
+            self._todos_dirty = False
+        if self._intents_dirty:
+            self._save_json(self.intents_file, self.intents)
+            self._intents_dirty = False
     
     def create_todo(self, intent: DetectedIntent, priority: int = 3) -> TodoItem:
         """Create a todo from detected intent."""
-        import uuid
-        
         todo_id = f"todo_{uuid.uuid4().hex[:8]}"
         
         if intent.intent_type == "project":
@@ -220,6 +356,7 @@ class TodoManager:
         else:
             title = intent.content
         
+        now_iso = datetime.utcnow().isoformat()
         todo = TodoItem(
             id=todo_id,
             title=title,
@@ -228,8 +365,8 @@ class TodoManager:
             context=intent.context,
             status="pending",
             priority=priority,
-            created_at=datetime.utcnow().isoformat(),
-            updated_at=datetime.utcnow().isoformat(),
+            created_at=now_iso,
+            updated_at=now_iso,
             due_at=None,
             last_reminded_at=None,
             reminder_count=0,
@@ -237,13 +374,13 @@ class TodoManager:
         )
         
         self.todos[todo_id] = asdict(todo)
-        self._save_json(self.todos_file, self.todos)
+        self._index_todo(todo_id)
         
-        intent_data = asdict(intent)
+        intent_data = intent._asdict()
         intent_data['id'] = f"intent_{uuid.uuid4().hex[:8]}"
         intent_data['related_todo_id'] = todo_id
         self.intents.append(intent_data)
-        self._save_json(self.intents_file, self.intents)
+        self._mark_dirty(todos=True, intents=True)
         
         return todo
     
@@ -252,7 +389,8 @@ class TodoManager:
         if todo_id in self.todos:
             self.todos[todo_id]['status'] = 'completed'
             self.todos[todo_id]['updated_at'] = datetime.utcnow().isoformat()
-            self._save_json(self.todos_file, self.todos)
+            self._index_todo(todo_id)
+            self._mark_dirty(todos=True)
             return True
         return False
     
@@ -261,21 +399,36 @@ class TodoManager:
         if todo_id in self.todos:
             self.todos[todo_id]['status'] = 'dismissed'
             self.todos[todo_id]['updated_at'] = datetime.utcnow().isoformat()
-            self._save_json(self.todos_file, self.todos)
+            self._index_todo(todo_id)
+            self._mark_dirty(todos=True)
             return True
         return False
     
+    def find_pending_by_title(self, query: str) -> Optional[TodoItem]:
+        """Find the first pending todo whose title contains query (case-insensitive)."""
+        query = query.lower()
+        for todo_id in self._pending_ids:
+            todo_data = self.todos[todo_id]
+            if query in todo_data['title'].lower():
+                return TodoItem(**todo_data)
+        return None
+    
     def get_pending_todos(self, limit: int = 10) -> List[TodoItem]:
         """Get pending todos."""
-        todos = []
-        for todo_data in self.todos.values():
-            if todo_data['status'] == 'pending':
-                todos.append(TodoItem(**todo_data))
-        todos.sort(key=lambda x: (-x.priority, x.created_at))
-        return todos[:limit]
-    
-    def should_remind(self, todo_id: str) -> bool:
-        """Check if a todo should be reminded."""
+        # Select on the raw dicts; only the returned todos become TodoItems
+        top = heapq.nsmallest(
+            limit,
+            (self.todos[todo_id] for todo_id in self._pending_ids),
+            key=lambda t: (-t['priority'], t['created_at'])
+        )
+        return [TodoItem(**todo_data) for todo_data in top]
+    
+    def should_remind(self, todo_id: str, now_ts: float = None) -> bool:
+        """
+        Check if a todo should be reminded.
+        
+        ``now_ts`` (epoch seconds) lets a sweep share a single clock read.
+        """
         if todo_id not in self.todos:
             return False
         
@@ -284,27 +437,44 @@ class TodoManager:
         if todo['status'] != 'pending':
             return False
         
-        created = datetime.fromisoformat(todo['created_at'])
-        now = datetime.utcnow()
-        hours_elapsed = (now - created).total_seconds() / 3600
-        
-        if todo['last_reminded_at'] is None:
-            return hours_elapsed >= 24
-        else:
-            last = datetime.fromisoformat(todo['last_reminded_at'])
-            hours_since_remind = (now - last).total_seconds() / 3600
-            
-            if todo['reminder_count'] < 2:
-                return hours_since_remind >= 48
-            else:
-                return hours_since_remind >= 168
+        if now_ts is None:
+            now_ts = time.time()
+        created_ts, last_ts = self._ts[todo_id]
+        return _reminder_due(created_ts, last_ts, todo['reminder_count'], now_ts)
+    
+    def get_reminder_candidates(self) -> List[TodoItem]:
+        """Get todos that should be reminded now."""
+        # One clock read for the whole sweep, with the rule bound locally
+        now_ts = time.time()
+        ts = self._ts
+        due = _reminder_due
+        
+        candidates = []
+        for todo_id in self._pending_ids:
+            todo = self.todos[todo_id]
+            created_ts, last_ts = ts[todo_id]
+            if due(created_ts, last_ts, todo['reminder_count'], now_ts):
+                candidates.append(TodoItem(**todo))
+        return candidates
     
     def mark_reminded(self, todo_id: str):
         """Mark a todo as reminded."""
-        if todo_id in self.todos:
-            self.todos[todo_id]['last_reminded_at'] = datetime.utcnow().isoformat()
-            self.todos[todo_id]['reminder_count'] += 1
-            self._save_json(self.todos_file, self.todos)
+        self.mark_reminded_batch((todo_id,))
+    
+    def mark_reminded_batch(self, todo_ids):
+        """Mark several todos as reminded with one timestamp and one save."""
+        now_iso = datetime.utcnow().isoformat()
+        changed = False
+        for todo_id in todo_ids:
+            todo = self.todos.get(todo_id)
+            if todo is None:
+                continue
+            todo['last_reminded_at'] = now_iso
+            todo['reminder_count'] += 1
+            self._index_todo(todo_id)
+            changed = True
+        if changed:
+            self._mark_dirty(todos=True)
 
 
 # ============================================================================
@@ -333,12 +503,14 @@ class IntentAwareAssistant:
         intents = self.detector.detect(text, source="user")
         result['intents'] = intents
         
-        for intent in intents:
-            existing = self._find_similar_todo(intent)
-            if not existing:
-                priority = self._calculate_priority(intent)
-                todo = self.todo_manager.create_todo(intent, priority)
-                result['todos_created'].append(todo)
+        # One write of each file for all todos created from this message
+        with self.todo_manager.batch():
+            for intent in intents:
+                existing = self._find_similar_todo(intent)
+                if not existing:
+                    priority = self._calculate_priority(intent)
+                    todo = self.todo_manager.create_todo(intent, priority)
+                    result['todos_created'].append(todo)
         
         pending = self.todo_manager.get_pending_todos(limit=3)
         if pending:
@@ -350,12 +522,7 @@ class IntentAwareAssistant:
     
     def _find_similar_todo(self, intent: DetectedIntent) -> Optional[TodoItem]:
         """Find existing similar todo."""
-        for todo_data in self.todo_manager.todos.values():
-            if todo_data['status'] != 'pending':
-                continue
-            if intent.content.lower() in todo_data['title'].lower():
-                return TodoItem(**todo_data)
-        return None
+        return self.todo_manager.find_pending_by_title(intent.content)
     
     def _calculate_priority(self, intent: DetectedIntent) -> int:
         """Calculate priority based on intent type."""
@@ -7,10 +7,20 @@ Automatically generates project plans, tracks milestones, and provides adaptive
 import re
 import json
 import os
+import uuid
+import random
+import bisect
+import functools
+from array import array
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Tuple
-from enum import Enum
+from enum import Enum, IntEnum
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used as a fallback
+    orjson = None
 
 
 # ============================================================================
@@ -27,6 +37,17 @@ class Phase(Enum):
     COMPLETED = "completed"        # 完成
 
 
+class PhaseStatus(IntEnum):
+    """Phase status codes for in-memory indexes; phases store the names."""
+    PENDING = 0
+    IN_PROGRESS = 1
+    COMPLETED = 2
+    BLOCKED = 3
+
+
+PHASE_STATUS_CODES = {status.name.lower(): status for status in PhaseStatus}
+
+
 # Default project templates
 PROJECT_TEMPLATES = {
     "web_app": {
@@ -82,6 +103,31 @@ PROJECT_TEMPLATES = {
     }
 }
 
+# Per-template total duration, and display name -> template key
+TEMPLATE_TOTAL_DAYS = {
+    key: sum(p.get("duration_days", 3) for p in template["phases"])
+    for key, template in PROJECT_TEMPLATES.items()
+}
+TEMPLATE_NAME_TO_KEY = {template["name"]: key for key, template in PROJECT_TEMPLATES.items()}
+
+# Initial phase dicts per template, built once; generate_plan hands each
+# project shallow copies with its own tasks and completed_tasks lists
+_CANON_PHASES = {
+    key: tuple(
+        {
+            "name": phase_info["name"],
+            "status": "pending",
+            "start_date": None,
+            "end_date": None,
+            "tasks": phase_info.get("tasks", []),
+            "completed_tasks": [],
+            "notes": ""
+        }
+        for phase_info in template["phases"]
+    )
+    for key, template in PROJECT_TEMPLATES.items()
+}
+
 
 # ============================================================================
 # Data Classes
@@ -135,44 +181,60 @@ class ProgressMilestone:
 # Project Plan Generator
 # ============================================================================
 
+# Project name patterns: "做个 X" or "开发 X". Tried in order; a pattern whose
+# name is too short falls through to the next one.
+PROJECT_NAME_PATTERNS = [
+    re.compile(r"做个?(.+?)(?:的|用|吧|，|$)"),
+    re.compile(r"开发(.+?)(?:的|用|吧|，|$)"),
+    re.compile(r"做个?(.+?)项目"),
+    re.compile(r"做(.+?)工具"),
+]
+_NAME_PUNCT = str.maketrans("", "", "，。！？")
+
+# Project type keywords, checked in type order against the lowercased prompt
+PROJECT_TYPE_KEYWORDS = {
+    "web_app": ["网站", "web", "前端", "后端", "网站开发", "管理系统", "工具", "平台"],
+    "mobile_app": ["手机", "app", "移动应用", "小程序", "iOS", "Android"],
+    "api_service": ["api", "接口", "后端服务", "微服务", "server"],
+    "data_project": ["数据分析", "数据处理", "数据可视化", "报表", "机器学习", "AI"]
+}
+# Flattened keyword -> type rank table, scanned with one overlapping
+# alternation (listed by rank, so each position reports its best type)
+_TYPE_ORDER = list(PROJECT_TYPE_KEYWORDS)
+_TYPE_RANK = {}
+for _rank, _keywords in enumerate(PROJECT_TYPE_KEYWORDS.values()):
+    for _kw in _keywords:
+        _TYPE_RANK.setdefault(_kw.lower(), _rank)
+_TYPE_RE = re.compile("(?=(" + "|".join(map(re.escape, _TYPE_RANK)) + "))")
+
 class ProjectPlanGenerator:
     """Generates project plans based on detected intents."""
     
     @staticmethod
     def detect_project_type(prompt: str) -> str:
         """Detect what type of project this is."""
-        prompt_lower = prompt.lower()
-        
-        type_keywords = {
-            "web_app": ["网站", "web", "前端", "后端", "网站开发", "管理系统", "工具", "平台"],
-            "mobile_app": ["手机", "app", "移动应用", "小程序", "iOS", "Android"],
-            "api_service": ["api", "接口", "后端服务", "微服务", "server"],
-            "data_project": ["数据分析", "数据处理", "数据可视化", "报表", "机器学习", "AI"]
-        }
-        
-        for project_type, keywords in type_keywords.items():
-            if any(kw in prompt_lower for kw in keywords):
-                return project_type
-        
-        return "web_app"  # Most common, use this as default
+        # Earlier types win, wherever their keyword appears in the prompt
+        best = None
+        for match in _TYPE_RE.finditer(prompt.lower()):
+            rank = _TYPE_RANK[match.group(1)]
+            if best is None or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+        
+        if best is None:
+            return "web_app"  # Most common, use this as default
+        return _TYPE_ORDER[best]
     
     @staticmethod
     def extract_project_name(prompt: str) -> str:
         """Extract project name from prompt."""
-        # Pattern: "做个 X" or "开发 X"
-        patterns = [
-            r"做个?(.+?)(?:的|用|吧|，|$)",
-            r"开发(.+?)(?:的|用|吧|，|$)",
-            r"做个?(.+?)项目",
-            r"做(.+?)工具",
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, prompt)
+        for pattern in PROJECT_NAME_PATTERNS:
+            match = pattern.search(prompt)
             if match:
                 name = match.group(1).strip()
                 # Clean up
-                name = re.sub(r"[，。！？]", "", name)
+                name = name.translate(_NAME_PUNCT)
                 if len(name) > 2:
                     return name
         
@@ -188,26 +250,18 @@ class ProjectPlanGenerator:
         if project_type is None:
             project_type = ProjectPlanGenerator.detect_project_type(prompt)
         
-        template = PROJECT_TEMPLATES.get(project_type, PROJECT_TEMPLATES["general"])
+        template_key = project_type if project_type in PROJECT_TEMPLATES else "general"
+        template = PROJECT_TEMPLATES[template_key]
         
         # Build phases
-        phases = []
+        phases = [
+            {**phase, "tasks": list(phase["tasks"]), "completed_tasks": []}
+            for phase in _CANON_PHASES[template_key]
+        ]
         start_date = datetime.utcnow()
         
-        for phase_info in template["phases"]:
-            phase = {
-                "name": phase_info["name"],
-                "status": "pending",
-                "start_date": None,
-                "end_date": None,
-                "tasks": phase_info.get("tasks", []),
-                "completed_tasks": [],
-                "notes": ""
-            }
-            phases.append(phase)
-        
         # Calculate target end date
-        total_days = sum(p.get("duration_days", 3) for p in template["phases"])
+        total_days = TEMPLATE_TOTAL_DAYS[template_key]
         target_end = start_date + timedelta(days=total_days)
         
         return {
@@ -231,7 +285,10 @@ class ProjectPlanGenerator:
             tasks_str = f"（{', '.join(tasks[:3])}）" if tasks else ""
             msg += f"  {i}. {phase['name']}{tasks_str}\n"
         
-        msg += f"\n⏱️ 预计完成时间：约 {sum(p.get('duration_days', 3) for p in PROJECT_TEMPLATES.get(template_name, PROJECT_TEMPLATES['general'])['phases'])} 天\n"
+        # template_name is the display name from generate_plan
+        template_key = TEMPLATE_NAME_TO_KEY.get(template_name, template_name)
+        total_days = TEMPLATE_TOTAL_DAYS.get(template_key, TEMPLATE_TOTAL_DAYS["general"])
+        msg += f"\n⏱️ 预计完成时间：约 {total_days} 天\n"
         msg += "💡 有任何调整随时告诉我！"
         
         return msg
@@ -241,6 +298,18 @@ class ProjectPlanGenerator:
 # Progress Tracker
 # ============================================================================
 
+# Update-content patterns, tried in order (earlier patterns take priority),
+# each with the literal it cannot match without. Checking the literal first
+# keeps a leading (.+) from being retried at every position of a message
+# that lacks it, which is quadratic in the message length.
+UPDATE_CONTENT_PATTERNS = [
+    ("原型图画完了，", re.compile(r"原型图画完了，(.+)")),
+    ("代码写完了，", re.compile(r"代码写完了，(.+)")),
+    ("，接下来做", re.compile(r"(.+)，接下来做")),
+    ("，然后", re.compile(r"(.+)，然后")),
+    ("，现在开始", re.compile(r"(.+)，现在开始")),
+]
+
 class ProgressTracker:
     """Tracks project progress based on user feedback."""
     
@@ -277,45 +346,115 @@ class ProgressTracker:
             (phase, progress_type) or (None, None)
             progress_type: "started" or "completed"
         """
-        text_lower = text.lower()
-        
-        for phase, signals in ProgressTracker.PROGRESS_SIGNALS.items():
-            # Check for completion
-            for signal in signals.get("completed", []):
-                if signal in text:
-                    return phase, "completed"
-            
-            # Check for start
-            for signal in signals.get("started", []):
-                if signal in text:
-                    return phase, "started"
-        
-        return None, None
+        # Phases are checked in order, completion before start: keep the
+        # highest-priority bucket hit anywhere in the text
+        best = None
+        for match in _PROGRESS_RE.finditer(text):
+            rank = _PROGRESS_RANK[match.group(1)]
+            if best is None or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+        
+        if best is None:
+            return None, None
+        return _PROGRESS_BUCKETS[best]
     
     @staticmethod
     def extract_update_content(text: str) -> str:
         """Extract the actual update content from user message."""
         # Remove common prefixes
-        patterns = [
-            r"原型图画完了，(.+)",
-            r"代码写完了，(.+)",
-            r"(.+)，接下来做",
-            r"(.+)，然后",
-            r"(.+)，现在开始",
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for literal, pattern in UPDATE_CONTENT_PATTERNS:
+            if literal not in text:
+                continue
+            match = pattern.search(text)
             if match:
                 return match.group(1).strip()
         
         return text[:100] if len(text) > 100 else text
 
 
+# (phase, progress_type) in detect_progress priority order, and each signal's
+# rank in it. The alternation lists signals by rank inside a lookahead, so
+# every position reports its highest-priority signal in one overlapping scan.
+_PROGRESS_BUCKETS = [
+    (phase, progress_type)
+    for phase, signals in ProgressTracker.PROGRESS_SIGNALS.items()
+    for progress_type in ("completed", "started")
+]
+_PROGRESS_RANK = {}
+for _rank, (_phase, _progress_type) in enumerate(_PROGRESS_BUCKETS):
+    for _signal in ProgressTracker.PROGRESS_SIGNALS[_phase].get(_progress_type, []):
+        _PROGRESS_RANK.setdefault(_signal, _rank)
+_PROGRESS_RE = re.compile(
+    "(?=(" + "|".join(map(re.escape, _PROGRESS_RANK)) + "))"
+)
+
+
+def _keyword_re(keywords) -> re.Pattern:
+    """Compile keywords into one alternation for a single any-of scan."""
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
 # ============================================================================
 # Smart Follow-Up Generator
 # ============================================================================
 
+TASK_KEYWORDS_RE = _keyword_re(["做", "写", "开发", "完成", "测试", "部署", "实现"])
+CASUAL_TRIGGERS_RE = _keyword_re(["天气", "最近", "今天", "这周", "忙", "在吗", "你好"])
+
+# Message templates, filled with str.format after one is picked
+FOLLOW_UP_TEMPLATES = {
+    "ideation": (
+        "「{name}」的想法想清楚了吗？",
+        "「{name}」有什么新想法吗？",
+    ),
+    "planning": (
+        "「{name}」的设计进展如何？",
+        "「{name}」的原型图画完了吗？",
+    ),
+    "implementation": (
+        "「{name}」开发得怎么样了？",
+        "「{name}」写到哪一步了？",
+    ),
+    "testing": (
+        "「{name}」测试完了吗？",
+        "「{name}」还有Bug要修吗？",
+    ),
+    "deployment": (
+        "「{name}」部署了吗？",
+        "「{name}」上线了没？",
+    )
+}
+DEFAULT_FOLLOW_UP = ("「{name}」有什么进展吗？",)
+ENCOURAGEMENT_TEMPLATES = (
+    "好的，记录下来！{phase} 阶段完成。",
+    "收到！{phase} 完成，棒！🎉",
+    "好的，继续加油！进入下一阶段。",
+)
+PHASE_SUGGESTIONS = {
+    "ideation": (
+        "建议先梳理清楚核心功能，不用一次想太多",
+        "可以先做个最小可行性版本 MVP",
+    ),
+    "planning": (
+        "原型图可以用 Figma 快速画",
+        "设计阶段建议先确认流程，再做详细设计",
+    ),
+    "implementation": (
+        "建议先搭框架，再填充细节",
+        "代码可以先写注释，保持清晰",
+    ),
+    "testing": (
+        "测试用例建议覆盖核心流程",
+        "可以先用自动化测试省时间",
+    ),
+    "deployment": (
+        "建议先部署到测试环境，确认没问题再正式上线",
+        "记得做好监控和日志",
+    )
+}
+
 class FollowUpGenerator:
     """Generates natural follow-up messages."""
     
@@ -335,13 +474,11 @@ class FollowUpGenerator:
         if len(text) < 5:
             return False, None
         
-        task_keywords = ["做", "写", "开发", "完成", "测试", "部署", "实现"]
-        if any(kw in text for kw in task_keywords):
+        if TASK_KEYWORDS_RE.search(text):
             return False, None
         
         # Good opportunities: casual messages
-        casual_triggers = ["天气", "最近", "今天", "这周", "忙", "在吗", "你好"]
-        if any(trigger in text for trigger in casual_triggers):
+        if CASUAL_TRIGGERS_RE.search(text):
             # Find most urgent pending project
             for project in pending_projects:
                 if project.status == "active":
@@ -353,122 +490,295 @@ class FollowUpGenerator:
     def generate_follow_up(project: Project) -> str:
         """Generate a natural follow-up message."""
         current_phase = project.phases[project.current_phase]
-        phase_name = current_phase["name"]
-        next_phase = None
-        if project.current_phase + 1 < len(project.phases):
-            next_phase = project.phases[project.current_phase + 1]["name"]
-        
-        templates = {
-            "ideation": [
-                f"「{project.name}」的想法想清楚了吗？",
-                f"「{project.name}」有什么新想法吗？",
-            ],
-            "planning": [
-                f"「{project.name}」的设计进展如何？",
-                f"「{project.name}」的原型图画完了吗？",
-            ],
-            "implementation": [
-                f"「{project.name}」开发得怎么样了？",
-                f"「{project.name}」写到哪一步了？",
-            ],
-            "testing": [
-                f"「{project.name}」测试完了吗？",
-                f"「{project.name}」还有Bug要修吗？",
-            ],
-            "deployment": [
-                f"「{project.name}」部署了吗？",
-                f"「{project.name}」上线了没？",
-            ]
-        }
-        
-        import random
-        messages = templates.get(current_phase.get("status", "implementation"), 
-                                [f"「{project.name}」有什么进展吗？"])
-        
-        return random.choice(messages)
+        templates = FOLLOW_UP_TEMPLATES.get(
+            current_phase.get("status", "implementation"), DEFAULT_FOLLOW_UP
+        )
+        return random.choice(templates).format(name=project.name)
     
     @staticmethod
-    def generate_encouragement(project: Project) -> str:
-        """Generate encouragement after user progress update."""
-        current_phase = project.phases[project.current_phase]
-        
-        encouragements = [
-            f"好的，记录下来！{current_phase['name']} 阶段完成。",
-            f"收到！{current_phase['name']} 完成，棒！🎉",
-            f"好的，继续加油！进入下一阶段。",
-        ]
-        
-        import random
-        return random.choice(encouragements)
+    def generate_encouragement(project: Dict) -> str:
+        """Generate encouragement after user progress update (project as stored dict)."""
+        current_phase = project["phases"][project["current_phase"]]
+        return random.choice(ENCOURAGEMENT_TEMPLATES).format(phase=current_phase["name"])
     
     @staticmethod
-    def generate_suggestion(project: Project) -> str:
-        """Generate AI suggestions for the project."""
-        current_phase = project.phases[project.current_phase]["name"]
-        
-        suggestions = {
-            "ideation": [
-                "建议先梳理清楚核心功能，不用一次想太多",
-                "可以先做个最小可行性版本 MVP",
-            ],
-            "planning": [
-                "原型图可以用 Figma 快速画",
-                "设计阶段建议先确认流程，再做详细设计",
-            ],
-            "implementation": [
-                "建议先搭框架，再填充细节",
-                "代码可以先写注释，保持清晰",
-            ],
-            "testing": [
-                "测试用例建议覆盖核心流程",
-                "可以先用自动化测试省时间",
-            ],
-            "deployment": [
-                "建议先部署到测试环境，确认没问题再正式上线",
-                "记得做好监控和日志",
-            ]
-        }
-        
-        import random
-        return random.choice(suggestions.get(current_phase, suggestions["implementation"]))
+    def generate_suggestion(project: Dict) -> str:
+        """Generate AI suggestions for the project (project as stored dict)."""
+        current_phase = project["phases"][project["current_phase"]]["name"]
+        return random.choice(PHASE_SUGGESTIONS.get(current_phase, PHASE_SUGGESTIONS["implementation"]))
 
 
 # ============================================================================
 # Project Manager
 # ============================================================================
 
+# Project event-log records between snapshots into the projects/ shards
+PROJECT_SNAPSHOT_EVERY = 50
+
+# Milestone target dates are naive UTC ISO strings
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _utc_ts(dt: datetime) -> float:
+    return (dt - _EPOCH).total_seconds()
+
+
+def _complete_phase(project: Dict, idx: int, now_iso: str):
+    """Mark phase idx completed and start the next one (or finish the project)."""
+    phases = project["phases"]
+    phases[idx]["status"] = "completed"
+    phases[idx]["end_date"] = now_iso
+    
+    if idx + 1 < len(phases):
+        next_phase = phases[idx + 1]
+        if next_phase["status"] != "completed":
+            next_phase["status"] = "in_progress"
+            next_phase["start_date"] = now_iso
+            project["current_phase"] = idx + 1
+    else:
+        project["status"] = "completed"
+
+
+def _start_phase(project: Dict, idx: int, now_iso: str):
+    """Mark phase idx in progress, keeping an earlier start date."""
+    phase = project["phases"][idx]
+    phase["status"] = "in_progress"
+    if not phase.get("start_date"):
+        phase["start_date"] = now_iso
+
+
+# progress_type -> phase transition; other types are only recorded
+PROGRESS_TRANSITIONS = {
+    "completed": _complete_phase,
+    "started": _start_phase,
+}
+
+
+def _apply_progress(project: Dict, idx: int, progress_type: str, phase: str, content: str):
+    """Apply one progress report to a project dict in place."""
+    now_iso = datetime.utcnow().isoformat()
+    transition = PROGRESS_TRANSITIONS.get(progress_type)
+    if transition is not None:
+        transition(project, idx, now_iso)
+    
+    project["user_updates"].append({
+        "phase": phase,
+        "type": progress_type,
+        "content": content,
+        "timestamp": now_iso
+    })
+    project["updated_at"] = now_iso
+
 class ProjectManager:
     """Manages projects, tracks progress, and generates follow-ups."""
     
     def __init__(self, data_dir: str = None):
         self.data_dir = data_dir or "/home/tars/Workspace/safeclaw/data"
-        os.makedirs(self.data_dir, exist_ok=True)
         
+        # Legacy single-file store, folded into the per-project shards
         self.projects_file = os.path.join(self.data_dir, "projects.json")
+        self.projects_dir = os.path.join(self.data_dir, "projects")
         self.milestones_file = os.path.join(self.data_dir, "progress_milestones.json")
         
-        self.projects = self._load_json(self.projects_file, {})
-        self.milestones = self._load_json(self.milestones_file, [])
+        self.events_file = os.path.join(self.data_dir, "projects.events.jsonl")
+        
+        # Projects and milestones are read on first access, so constructing
+        # a manager touches no files
+        self._projects: Optional[Dict[str, Dict]] = None
+        self._milestones: Optional[List[Dict]] = None
+        
+        # Bumped on every project mutation; get_pending_projects reuses its
+        # last result while the version is unchanged
+        self._projects_version = 0
+        self._pending_cache: Optional[Tuple[int, List[Project]]] = None
+        
+        # project_id -> phase status codes packed in a bytearray, for
+        # status counts, and first phase index per name and per status
+        self._phase_status: Dict[str, bytearray] = {}
+        self._phase_by_name: Dict[str, Dict[str, int]] = {}
+        self._phase_by_status: Dict[str, Dict[str, int]] = {}
+        
+        # Open milestone indexes ordered by target time, and those targets
+        # as epoch seconds in the same order, for bisecting in
+        # check_milestones. Bumped by add_milestone/update_milestone; the
+        # index is rebuilt when its version lags behind.
+        self._milestones_version = 0
+        self._milestone_index_version = -1
+        self._milestone_order: List[int] = []
+        self._milestone_ts = array('d')
+    
+    @property
+    def projects(self) -> Dict[str, Dict]:
+        if self._projects is None:
+            self._load_projects()
+        return self._projects
+    
+    @property
+    def milestones(self) -> List[Dict]:
+        if self._milestones is None:
+            os.makedirs(self.data_dir, exist_ok=True)
+            self._milestones = self._load_json(self.milestones_file, [])
+        return self._milestones
+    
+    def _index_milestones(self):
+        """Sort the open milestones that have a target date by that date."""
+        milestones = self.milestones
+        targets = {
+            i: _utc_ts(datetime.fromisoformat(m["target_date"]))
+            for i, m in enumerate(milestones)
+            if m["status"] in ("upcoming", "due") and m.get("target_date")
+        }
+        self._milestone_order = sorted(targets, key=targets.__getitem__)
+        self._milestone_ts = array('d', (targets[i] for i in self._milestone_order))
+        self._milestone_index_version = self._milestones_version
+    
+    def _load_projects(self):
+        """
+        Load the projects/{id}.json shards, which are the snapshot, and
+        replay the event log of mutations since then on top.
+        """
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._projects = self._load_json(self.projects_file, {})
+        legacy = bool(self._projects)
+        self._projects.update(self._load_shards())
+        # Project ids recorded since their shard was last written
+        self._unsnapshotted = set(self._projects) if legacy else set()
+        self._event_count = self._replay_events()
+        
+        for project_id in self._projects:
+            self._index_phases(project_id)
+        if legacy or self._event_count >= PROJECT_SNAPSHOT_EVERY:
+            self._snapshot()
+        if legacy:
+            os.remove(self.projects_file)
     
     def _load_json(self, filepath: str, default):
         """Load JSON data."""
         if os.path.exists(filepath):
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                # One read of the raw bytes; both parsers take UTF-8 bytes
+                with open(filepath, 'rb') as f:
+                    data = f.read()
+                if orjson is not None:
+                    return orjson.loads(data)
+                return json.loads(data)
             except:
                 pass
         return default
     
     def _save_json(self, filepath: str, data):
         """Save JSON data."""
+        if orjson is not None:
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(
+                    data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                ))
+            return
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
     
+    def _project_path(self, project_id: str) -> str:
+        return os.path.join(self.projects_dir, f"{project_id}.json")
+    
+    def _load_shards(self) -> Dict[str, Dict]:
+        """Load every projects/*.json shard, keyed by project id."""
+        projects = {}
+        if not os.path.isdir(self.projects_dir):
+            return projects
+        for filename in os.listdir(self.projects_dir):
+            if not filename.endswith(".json"):
+                continue
+            project = self._load_json(os.path.join(self.projects_dir, filename), None)
+            if project is not None:
+                projects[project["id"]] = project
+        return projects
+    
+    def _replay_events(self) -> int:
+        """Apply logged project records to the snapshot; returns their count."""
+        count = 0
+        if not os.path.exists(self.events_file):
+            return count
+        loads = orjson.loads if orjson is not None else json.loads
+        line = b""
+        with open(self.events_file, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    project = loads(line)["project"]
+                except (ValueError, KeyError):
+                    continue
+                self._projects[project["id"]] = project
+                self._unsnapshotted.add(project["id"])
+                count += 1
+        if line and not line.endswith(b"\n"):
+            # Torn last write: terminate it so the next event starts on a
+            # line of its own instead of being glued to the fragment
+            with open(self.events_file, 'ab') as f:
+                f.write(b"\n")
+        return count
+    
+    def _index_phases(self, project_id: str):
+        phases = self.projects[project_id]["phases"]
+        self._phase_status[project_id] = bytearray(
+            PHASE_STATUS_CODES.get(p["status"], PhaseStatus.PENDING)
+            for p in phases
+        )
+        by_name = self._phase_by_name[project_id] = {}
+        by_status = self._phase_by_status[project_id] = {}
+        for i, p in enumerate(phases):
+            by_name.setdefault(p["name"], i)
+            by_status.setdefault(p.get("status"), i)
+    
+    def _find_phase(self, project_id: str, phase: str) -> Optional[int]:
+        """First phase index whose name or status equals phase."""
+        by_name = self._phase_by_name[project_id].get(phase)
+        by_status = self._phase_by_status[project_id].get(phase)
+        if by_name is None:
+            return by_status
+        if by_status is None:
+            return by_name
+        return min(by_name, by_status)
+    
+    def _record_project(self, project_id: str):
+        """
+        Persist one project by appending its current state to the event log.
+        
+        Records are whole-project puts, so replaying one twice is harmless;
+        the log is folded into the shards every PROJECT_SNAPSHOT_EVERY
+        records.
+        """
+        self._projects_version += 1
+        self._index_phases(project_id)
+        event = {"ts": datetime.utcnow().isoformat(), "project": self.projects[project_id]}
+        if orjson is not None:
+            line = orjson.dumps(event) + b"\n"
+        else:
+            line = json.dumps(event, ensure_ascii=False).encode('utf-8') + b"\n"
+        with open(self.events_file, 'ab') as f:
+            f.write(line)
+        self._unsnapshotted.add(project_id)
+        self._event_count += 1
+        if self._event_count >= PROJECT_SNAPSHOT_EVERY:
+            self._snapshot()
+    
+    def _snapshot(self):
+        """
+        Write the shard of each project touched since the last snapshot,
+        then empty the event log. Untouched projects are not rewritten.
+        """
+        os.makedirs(self.projects_dir, exist_ok=True)
+        for project_id in self._unsnapshotted:
+            path = self._project_path(project_id)
+            tmp_path = path + ".tmp"
+            self._save_json(tmp_path, self.projects[project_id])
+            os.replace(tmp_path, path)
+        self._unsnapshotted.clear()
+        open(self.events_file, 'w').close()
+        self._event_count = 0
+    
     def create_project(self, prompt: str) -> Tuple[Project, str]:
         """Create a new project from user intent."""
-        import uuid
-        
         project_id = f"proj_{uuid.uuid4().hex[:8]}"
         
         # Generate plan
@@ -476,26 +786,31 @@ class ProjectManager:
         project_name = ProjectPlanGenerator.extract_project_name(prompt)
         plan = ProjectPlanGenerator.generate_plan(prompt, project_type)
         
-        # Create project
-        project = Project(
-            id=project_id,
-            name=project_name,
-            description=prompt[:200],
-            template=project_type,
-            phases=plan["phases"],
-            current_phase=0,
-            status="active",
-            priority=3,
-            created_at=datetime.utcnow().isoformat(),
-            updated_at=datetime.utcnow().isoformat(),
-            start_date=datetime.utcnow().isoformat(),
-            target_end_date=plan["target_end_date"],
-            context={"original_prompt": prompt}
-        )
+        # Create project, stored as a plain dict in Project field order; the
+        # plan is freshly built, so nothing needs copying
+        now_iso = datetime.utcnow().isoformat()
+        project_data = {
+            "id": project_id,
+            "name": project_name,
+            "description": prompt[:200],
+            "template": project_type,
+            "phases": plan["phases"],
+            "current_phase": 0,
+            "status": "active",
+            "priority": 3,
+            "created_at": now_iso,
+            "updated_at": now_iso,
+            "start_date": now_iso,
+            "target_end_date": plan["target_end_date"],
+            "context": {"original_prompt": prompt},
+            "user_updates": [],
+            "ai_suggestions": []
+        }
         
         # Save
-        self.projects[project_id] = asdict(project)
-        self._save_json(self.projects_file, self.projects)
+        self.projects[project_id] = project_data
+        self._record_project(project_id)
+        project = Project(**project_data)
         
         # Generate intro message
         intro = ProjectPlanGenerator.generate_intro_message(
@@ -514,87 +829,107 @@ class ProjectManager:
         project = self.projects[project_id]
         
         # Find target phase index
-        target_idx = None
-        for i, phase_data in enumerate(project["phases"]):
-            if phase_data["name"] == phase or phase_data.get("status") == phase:
-                target_idx = i
-                break
+        target_idx = self._find_phase(project_id, phase)
         
         if target_idx is None:
             return False, f"找不到阶段: {phase}"
         
-        # Update based on progress type
-        if progress_type == "completed":
-            # Mark current phase as completed
-            project["phases"][target_idx]["status"] = "completed"
-            project["phases"][target_idx]["end_date"] = datetime.utcnow().isoformat()
-            
-            # Start next phase if exists
-            if target_idx + 1 < len(project["phases"]):
-                next_phase = project["phases"][target_idx + 1]
-                if next_phase["status"] != "completed":
-                    next_phase["status"] = "in_progress"
-                    next_phase["start_date"] = datetime.utcnow().isoformat()
-                    project["current_phase"] = target_idx + 1
-            else:
-                project["status"] = "completed"
-        
-        elif progress_type == "started":
-            project["phases"][target_idx]["status"] = "in_progress"
-            if not project["phases"][target_idx].get("start_date"):
-                project["phases"][target_idx]["start_date"] = datetime.utcnow().isoformat()
-        
-        # Record update
-        project["user_updates"].append({
-            "phase": phase,
-            "type": progress_type,
-            "content": update_text,
-            "timestamp": datetime.utcnow().isoformat()
-        })
-        
-        project["updated_at"] = datetime.utcnow().isoformat()
-        self.projects[project_id] = project
-        self._save_json(self.projects_file, self.projects)
-        
-        # Generate encouragement
-        encouragement = FollowUpGenerator.generate_encouragement(
-            Project(**project)
-        )
+        _apply_progress(project, target_idx, progress_type, phase, update_text)
+        self._record_project(project_id)
         
-        # Generate suggestion
-        suggestion = FollowUpGenerator.generate_suggestion(
-            Project(**project)
-        )
+        # Encouragement and suggestion read the stored dict directly
+        encouragement = FollowUpGenerator.generate_encouragement(project)
+        suggestion = FollowUpGenerator.generate_suggestion(project)
         
         return True, f"{encouragement}\n\n💡 {suggestion}"
     
     def get_pending_projects(self) -> List[Project]:
         """Get all active pending projects."""
-        active = []
-        for p in self.projects.values():
-            if p["status"] == "active":
-                active.append(Project(**p))
+        cache = self._pending_cache
+        if cache is not None and cache[0] == self._projects_version:
+            return list(cache[1])
+        
+        active = [p for p in self.projects.values() if p["status"] == "active"]
         # Sort by priority and creation time
-        active.sort(key=lambda x: (-x.priority, x.created_at))
-        return active
+        active.sort(key=lambda p: (-p["priority"], p["created_at"]))
+        pending = [Project(**p) for p in active]
+        self._pending_cache = (self._projects_version, pending)
+        return list(pending)
+    
+    def add_milestone(
+        self,
+        project_id: str,
+        phase_name: str,
+        description: str,
+        target_date: str
+    ) -> ProgressMilestone:
+        """Add an upcoming milestone; target_date is a naive UTC ISO string."""
+        milestone = {
+            "id": f"ms_{uuid.uuid4().hex[:8]}",
+            "project_id": project_id,
+            "phase_name": phase_name,
+            "description": description,
+            "target_date": target_date,
+            "status": "upcoming",
+            "reminders_sent": 0
+        }
+        self.milestones.append(milestone)
+        self._milestones_version += 1
+        self._save_json(self.milestones_file, self.milestones)
+        return ProgressMilestone(**milestone)
+    
+    def update_milestone(self, milestone_id: str, **updates) -> Optional[ProgressMilestone]:
+        """
+        Update a milestone's fields. Target dates and statuses must be
+        changed through here so check_milestones sees them.
+        """
+        for milestone in self.milestones:
+            if milestone["id"] == milestone_id:
+                break
+        else:
+            return None
+        
+        for key, value in updates.items():
+            if key in milestone:
+                milestone[key] = value
+        self._milestones_version += 1
+        self._save_json(self.milestones_file, self.milestones)
+        return ProgressMilestone(**milestone)
     
     def check_milestones(self) -> List[Dict]:
         """Check for due/overdue milestones."""
-        due = []
-        now = datetime.utcnow()
-        
-        for mid, milestone in enumerate(self.milestones):
-            if milestone["status"] in ["upcoming", "due"]:
-                target = datetime.fromisoformat(milestone["target_date"])
-                
-                if now > target:
-                    milestone["status"] = "overdue"
-                    due.append(milestone)
-                elif (target - now).total_seconds() < 86400:  # Due within 24h
-                    milestone["status"] = "due"
-                    due.append(milestone)
+        milestones = self.milestones
+        if self._milestone_index_version != self._milestones_version:
+            self._index_milestones()
+        
+        # Targets before now are overdue and the next 24h are due; both are
+        # prefixes of the sorted targets, found by bisection
+        now_ts = _utc_ts(datetime.utcnow())
+        ts = self._milestone_ts
+        overdue_end = bisect.bisect_left(ts, now_ts)
+        due_end = bisect.bisect_left(ts, now_ts + 86400)
+        order = self._milestone_order
+        hits = sorted(
+            (order[pos], "overdue" if pos < overdue_end else "due")
+            for pos in range(due_end)
+        )
         
-        self._save_json(self.milestones_file, self.milestones)
+        due = []
+        dirty = False
+        for i, new_status in hits:
+            milestone = milestones[i]
+            status = milestone["status"]
+            if status != "upcoming" and status != "due":
+                continue
+            
+            if new_status != status:
+                milestone["status"] = new_status
+                dirty = True
+            due.append(milestone)
+        
+        # Only write when a status actually changed
+        if dirty:
+            self._save_json(self.milestones_file, self.milestones)
         return due
     
     def should_follow_up_now(self, user_text: str) -> Tuple[bool, Optional[str], Optional[str]]:
@@ -623,20 +958,21 @@ class ProjectManager:
         if project_id not in self.projects:
             return None
         
-        project = Project(**self.projects[project_id])
+        project = self.projects[project_id]
+        phases = project["phases"]
         
-        completed = sum(1 for p in project.phases if p["status"] == "completed")
-        total = len(project.phases)
+        completed = self._phase_status[project_id].count(PhaseStatus.COMPLETED)
+        total = len(phases)
         
-        current = project.phases[project.current_phase] if project.phases else {}
+        current = phases[project["current_phase"]] if phases else {}
         
         return {
-            "id": project.id,
-            "name": project.name,
+            "id": project["id"],
+            "name": project["name"],
             "progress": f"{completed}/{total} 阶段完成",
             "current_phase": current.get("name", "N/A"),
-            "status": project.status,
-            "created": project.created_at[:10]
+            "status": project["status"],
+            "created": project["created_at"][:10]
         }
 
 
@@ -644,6 +980,45 @@ class ProjectManager:
 # Main Integration Class
 # ============================================================================
 
+PROJECT_CREATION_RE = _keyword_re([
+    "我要开始做", "我想开始做", "正式启动",
+    "打算做个新的", "想做一个新的", "准备启动一个新",
+])
+PROGRESS_KEYWORDS_RE = _keyword_re(["完成了", "画完了", "写完了", "测试", "部署", "通过"])
+
+# Clear "start new project" openings, as one anchored alternation
+START_PROJECT_RE = re.compile(
+    r"(?:我要|我想)做个?(.+)"
+    r"|(?:打算|准备)做个?(.+)"
+    r"|(?:启动|开始)一个新?(.+)项目"
+)
+
+@functools.lru_cache(maxsize=256)
+def _classify_message(text: str) -> Tuple[Optional[str], Optional[str], bool]:
+    """
+    Classify a message from its text alone: (phase, progress_type,
+    is_new_project). Pure, so repeated messages skip the keyword scans.
+    """
+    phase, progress_type = ProgressTracker.detect_progress(text)
+    
+    is_new_project = PROJECT_CREATION_RE.search(text) is not None
+    
+    # Also check if this looks like starting something entirely new
+    if not is_new_project:
+        # Only create if text is primarily about starting something new
+        # and doesn't contain progress-related keywords
+        has_progress = PROGRESS_KEYWORDS_RE.search(text) is not None
+        
+        # If text has progress keywords but didn't match existing project,
+        # it might be completing a phase
+        if not has_progress:
+            # Check for clear "start new project" intent
+            if START_PROJECT_RE.match(text):
+                is_new_project = True
+    
+    return phase, progress_type, is_new_project
+
+
 class ProjectAwareAssistant:
     """
     Main class that integrates:
@@ -654,9 +1029,17 @@ class ProjectAwareAssistant:
     """
     
     def __init__(self, data_dir: str = None):
-        self.project_manager = ProjectManager(data_dir)
+        self._data_dir = data_dir
+        self._project_manager: Optional[ProjectManager] = None
         self.progress_tracker = ProgressTracker()
     
+    @property
+    def project_manager(self) -> ProjectManager:
+        """Created on first use; trivial messages never build one."""
+        if self._project_manager is None:
+            self._project_manager = ProjectManager(self._data_dir)
+        return self._project_manager
+    
     def process_message(self, text: str) -> Dict:
         """
         Process a user message and handle accordingly.
@@ -674,9 +1057,14 @@ class ProjectAwareAssistant:
             "data": {}
         }
         
+        # Nothing below can match fewer than two non-blank characters
+        if len(text) < 2 or text.isspace():
+            return result
+        
+        phase, progress_type, is_new_project = _classify_message(text)
+        
         # 1. FIRST: Check for progress update in existing projects
         # This must come BEFORE project creation check to avoid creating duplicate projects
-        phase, progress_type = self.progress_tracker.detect_progress(text)
         
         if phase:
             # Find active project to update
@@ -703,41 +1091,6 @@ class ProjectAwareAssistant:
         
         # 2. SECOND: Check for explicit project creation intent
         # Only create new project if no active project matches
-        
-        # 2. SECOND: Check for explicit project creation intent
-        # Only create new project if no active project matches
-        project_creation_signals = [
-            ("start", ["我要开始做", "我想开始做", "正式启动"]),
-            ("create", ["打算做个新的", "想做一个新的", "准备启动一个新"]),
-        ]
-        
-        is_new_project = False
-        for signal_type, signals in project_creation_signals:
-            if any(signal in text for signal in signals):
-                is_new_project = True
-                break
-        
-        # Also check if this looks like starting something entirely new
-        if not is_new_project:
-            # Only create if text is primarily about starting something new
-            # and doesn't contain progress-related keywords
-            progress_keywords = ["完成了", "画完了", "写完了", "测试", "部署", "通过"]
-            has_progress = any(kw in text for kw in progress_keywords)
-            
-            # If text has progress keywords but didn't match existing project,
-            # it might be completing a phase
-            if not has_progress:
-                # Check for clear "start new project" intent
-                start_patterns = [
-                    r"^(我要|我想)做个?(.+)",
-                    r"^(打算|准备)做个?(.+)",
-                    r"^(启动|开始)一个新?(.+)项目",
-                ]
-                for pattern in start_patterns:
-                    if re.match(pattern, text):
-                        is_new_project = True
-                        break
-        
         if is_new_project:
             project, intro = self.project_manager.create_project(text)
             
@@ -848,8 +1201,6 @@ if __name__ == "__main__":
         for msg, desc in conversation:
             print(f"\n💬 用户: 「{msg}」")
             result = assistant.process_message(msg)
-            print(f"\n💬 用户: 「{msg}」")
-            result = assistant.process_message(msg)
             
             print(f"🤖 Action: {result['action']}")
             if result['response']:
@@ -0,0 +1,43 @@
+import gc
+import tempfile
+import unittest
+import weakref
+
+from intent_tracker.habit_tracker import HabitManager
+
+
+class HabitManagerPersistenceTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+    
+    def test_every_call_is_visible_to_a_second_manager(self):
+        manager = HabitManager(self.data_dir)
+        first, _ = manager.create_habit("fitness", "跑步")
+        second, _ = manager.create_habit("learning", "背单词")
+        manager.stop_habit(first.id)
+        
+        reopened = HabitManager(self.data_dir)
+        self.assertEqual(sorted(reopened.habits), sorted([first.id, second.id]))
+        self.assertEqual(reopened.habits[first.id]["status"], "cancelled")
+    
+    def test_log_and_counters_are_written_together(self):
+        manager = HabitManager(self.data_dir)
+        habit, _ = manager.create_habit("fitness", "跑步")
+        with manager.batch():
+            manager.log_habit(habit.id)
+            # A process dying here must not leave the log without its counters
+            reopened = HabitManager(self.data_dir)
+            self.assertEqual(reopened.habits[habit.id]["total_completed"], 1)
+            self.assertEqual(len(reopened.logs), 1)
+    
+    def test_manager_can_be_collected(self):
+        manager = HabitManager(self.data_dir)
+        ref = weakref.ref(manager)
+        del manager
+        gc.collect()
+        self.assertIsNone(ref())
+
+
+if __name__ == "__main__":
+    unittest.main()
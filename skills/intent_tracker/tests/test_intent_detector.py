@@ -0,0 +1,33 @@
+import unittest
+
+from intent_tracker import IntentDetector
+
+
+def _found(text: str) -> list:
+    return [(i.intent_type, i.content) for i in IntentDetector().detect(text)]
+
+
+class FusedRecallTest(unittest.TestCase):
+    """
+    Each intent type is one fused alternation scanned leftmost-first, so a
+    match consumes its text and overlapping matches of other patterns in
+    that span are not reported. The per-pattern scans this replaced also
+    found those; these cases pin the fused behaviour.
+    """
+    
+    def test_overlapping_decisions_yield_the_leftmost_match(self):
+        self.assertEqual(_found("选React吧就用Vue吧"), [("decision", "React吧就用Vue")])
+    
+    def test_nested_decision_is_not_reported(self):
+        # The per-pattern scans also reported "用Python" from 就...吧
+        self.assertEqual(_found("就用Python吧"), [("decision", "Python吧")])
+    
+    def test_separate_matches_are_all_reported(self):
+        self.assertEqual(
+            _found("决定了方案A。敲定了方案B"),
+            [("decision", "方案A"), ("decision", "方案B")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import gc
+import tempfile
+import unittest
+import weakref
+
+from intent_tracker.intent_tracker import IntentDetector, TodoManager
+
+
+class FusedRecallTest(unittest.TestCase):
+    """
+    Each intent type is one fused alternation scanned leftmost-first, so
+    overlapping matches inside an earlier match are not reported. The
+    per-pattern scans this replaced also found them; these cases pin the
+    fused behaviour.
+    """
+    
+    def _found(self, text):
+        return [(i.intent_type, i.content) for i in IntentDetector().detect(text)]
+    
+    def test_later_todo_inside_a_match_is_not_reported(self):
+        # The per-pattern scans also reported "部署" from 接下来
+        self.assertEqual(
+            self._found("下一步要写测试接下来部署"),
+            [("todo", "写测试接下来部署")]
+        )
+    
+    def test_overlapping_decisions_yield_the_leftmost_match(self):
+        self.assertEqual(self._found("选React吧就用Vue吧"), [("decision", "React吧就用Vue")])
+
+
+class TodoManagerPersistenceTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.detector = IntentDetector()
+    
+    def _create(self, manager, text):
+        return manager.create_todo(self.detector.detect(text)[0])
+    
+    def test_every_call_is_visible_to_a_second_manager(self):
+        manager = TodoManager(self.data_dir)
+        ids = [self._create(manager, f"我要做个项目{i}号").id for i in range(3)]
+        manager.complete_todo(ids[0])
+        
+        reopened = TodoManager(self.data_dir)
+        self.assertEqual(sorted(reopened.todos), sorted(ids))
+        self.assertEqual(reopened.todos[ids[0]]['status'], 'completed')
+    
+    def test_batch_writes_once_at_the_end(self):
+        manager = TodoManager(self.data_dir)
+        with manager.batch():
+            todo = self._create(manager, "我要做个博客系统")
+            self.assertEqual(TodoManager(self.data_dir).todos, {})
+        self.assertIn(todo.id, TodoManager(self.data_dir).todos)
+    
+    def test_manager_can_be_collected(self):
+        manager = TodoManager(self.data_dir)
+        ref = weakref.ref(manager)
+        del manager
+        gc.collect()
+        self.assertIsNone(ref())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from intent_tracker.project_tracker import (
+    PROJECT_SNAPSHOT_EVERY,
+    PROJECT_TEMPLATES,
+    ProjectManager,
+    ProjectPlanGenerator,
+)
+
+
+class PlanTest(unittest.TestCase):
+    
+    def test_plans_do_not_share_task_lists(self):
+        for key in PROJECT_TEMPLATES:
+            first = ProjectPlanGenerator.generate_plan("x", key)
+            second = ProjectPlanGenerator.generate_plan("x", key)
+            first["phases"][0]["tasks"].append("改需求")
+            self.assertNotIn("改需求", second["phases"][0]["tasks"])
+            self.assertNotIn("改需求", PROJECT_TEMPLATES[key]["phases"][0].get("tasks", []))
+
+
+class ProjectPersistenceTest(unittest.TestCase):
+    """Round trips through the shards and event log via a fresh manager."""
+    
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.manager = ProjectManager(self.data_dir)
+    
+    def _reopen(self) -> ProjectManager:
+        return ProjectManager(self.data_dir)
+    
+    def test_legacy_projects_file_is_migrated(self):
+        project, _ = self.manager.create_project("我想做个项目管理工具")
+        legacy = {project.id: self.manager.projects[project.id]}
+        data_dir = tempfile.mkdtemp()
+        with open(os.path.join(data_dir, "projects.json"), 'w', encoding='utf-8') as f:
+            json.dump(legacy, f, ensure_ascii=False)
+        
+        migrated = ProjectManager(data_dir)
+        self.assertEqual(migrated.projects, legacy)
+        self.assertFalse(os.path.exists(migrated.projects_file))
+        self.assertTrue(os.path.exists(migrated._project_path(project.id)))
+        self.assertEqual(ProjectManager(data_dir).projects, legacy)
+    
+    def test_events_after_snapshot_are_replayed(self):
+        project, _ = self.manager.create_project("我想做个项目管理工具")
+        for _ in range(PROJECT_SNAPSHOT_EVERY):
+            self.manager.update_progress(project.id, "需求分析", "started", "x")
+        self.assertTrue(os.path.exists(self.manager._project_path(project.id)))
+        
+        # Mutations after the snapshot live only in the event log
+        self.manager.update_progress(project.id, "需求分析", "completed", "done")
+        reopened = self._reopen()
+        self.assertEqual(reopened.projects, self.manager.projects)
+        self.assertEqual(reopened.projects[project.id]["current_phase"], 1)
+    
+    def test_torn_last_event_is_skipped(self):
+        first, _ = self.manager.create_project("我想做个项目管理工具")
+        self.manager.create_project("我要做个博客网站")
+        # Simulate a write torn halfway through the last event
+        with open(self.manager.events_file, 'rb+') as f:
+            f.truncate(os.path.getsize(self.manager.events_file) - 10)
+        
+        reopened = self._reopen()
+        self.assertEqual(list(reopened.projects), [first.id])
+        
+        # Events appended after the torn line must still load
+        added, _ = reopened.create_project("打算做个机器学习平台")
+        self.assertEqual(sorted(self._reopen().projects), sorted([first.id, added.id]))
+
+
+class MilestoneTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.manager = ProjectManager(tempfile.mkdtemp())
+    
+    def test_target_moved_into_the_past_is_overdue(self):
+        now = datetime.utcnow()
+        milestone = self.manager.add_milestone(
+            "proj_1", "测试", "", (now + timedelta(days=3)).isoformat()
+        )
+        self.assertEqual(self.manager.check_milestones(), [])
+        
+        self.manager.update_milestone(
+            milestone.id, target_date=(now - timedelta(hours=1)).isoformat()
+        )
+        due = self.manager.check_milestones()
+        self.assertEqual([m["id"] for m in due], [milestone.id])
+        self.assertEqual(due[0]["status"], "overdue")
+    
+    def test_completed_milestone_without_target_date_is_skipped(self):
+        self.manager.milestones.append({
+            "id": "ms_done", "project_id": "proj_1", "phase_name": "测试",
+            "description": "", "target_date": None, "status": "completed",
+            "reminders_sent": 0
+        })
+        soon = self.manager.add_milestone(
+            "proj_1", "部署", "", (datetime.utcnow() + timedelta(hours=2)).isoformat()
+        )
+        self.assertEqual([m["id"] for m in self.manager.check_milestones()], [soon.id])
+
+
+if __name__ == "__main__":
+    unittest.main()
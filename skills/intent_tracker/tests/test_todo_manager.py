@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from intent_tracker import TODO_LOG_COMPACT_RATIO, DetectedIntent, TodoManager
+
+
+def _intent(content: str) -> DetectedIntent:
+    return DetectedIntent(
+        intent_type="todo",
+        content=content,
+        confidence=0.8,
+        context=content,
+        created_at=datetime.utcnow().isoformat(),
+        source="user"
+    )
+
+
+class TodoManagerTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.manager = TodoManager(self.data_dir)
+    
+    def test_cleared_due_date_is_not_overdue(self):
+        todo = self.manager.create_todo(_intent("写周报"))
+        past = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+        
+        self.manager.update_todo(todo.id, due_at=past)
+        self.assertEqual([t.id for t in self.manager.get_overdue_todos()], [todo.id])
+        
+        self.manager.update_todo(todo.id, due_at=None)
+        self.assertEqual(self.manager.get_overdue_todos(), [])
+
+
+
+class TodoLogTest(unittest.TestCase):
+    """Round trips through todos.jsonl via a fresh TodoManager."""
+    
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.manager = TodoManager(self.data_dir)
+    
+    def _reopen(self) -> TodoManager:
+        return TodoManager(self.data_dir)
+    
+    def _log_lines(self) -> list:
+        with open(self.manager.todos_file, 'rb') as f:
+            return f.read().splitlines()
+    
+    def test_partial_update_records_are_replayed(self):
+        todo = self.manager.create_todo(_intent("写周报"))
+        self.manager.mark_reminded(todo.id)
+        self.manager.mark_reminded(todo.id)
+        # One full record, then two partial ones
+        self.assertEqual(len(self._log_lines()), 3)
+        
+        reopened = self._reopen()
+        self.assertEqual(reopened.todos, self.manager.todos)
+        self.assertEqual(reopened.todos[todo.id]['reminder_count'], 2)
+        self.assertEqual(reopened.todos[todo.id]['title'], "待办: 写周报")
+    
+    def test_log_is_compacted(self):
+        todo = self.manager.create_todo(_intent("写周报"))
+        for i in range(3 * TODO_LOG_COMPACT_RATIO):
+            self.manager.update_todo(todo.id, priority=i % 5 + 1)
+        
+        self.assertLessEqual(len(self._log_lines()), TODO_LOG_COMPACT_RATIO)
+        self.assertEqual(self._reopen().todos, self.manager.todos)
+    
+    def test_truncated_last_line_is_skipped(self):
+        kept = self.manager.create_todo(_intent("写周报"))
+        self.manager.create_todo(_intent("买菜"))
+        # Simulate a write torn halfway through the last record
+        with open(self.manager.todos_file, 'rb+') as f:
+            f.truncate(os.path.getsize(self.manager.todos_file) - 10)
+        
+        reopened = self._reopen()
+        self.assertEqual(list(reopened.todos), [kept.id])
+        
+        # Records appended after the torn line must still load
+        added = reopened.create_todo(_intent("交房租"))
+        self.assertEqual(list(self._reopen().todos), [kept.id, added.id])
+
+
+if __name__ == "__main__":
+    unittest.main()